@@ -1,8 +1,27 @@
 from django.contrib import admin
 
-from blogapp.models import Article
+from blogapp.models import Article, Author, Category, Tag
+
+
+@admin.register(Author)
+class AuthorAdmin(admin.ModelAdmin):
+    list_display = "id", "name"
+    search_fields = "name",
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = "id", "name"
+    search_fields = "name",
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = "id", "name"
+    search_fields = "name",
 
 
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
-    list_display = "id", "title", "content", "pub_date"
+    list_display = "id", "title", "summary", "pub_date"
+    autocomplete_fields = "author", "category", "tags"
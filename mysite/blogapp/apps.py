@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
 
 
 class BlogappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blogapp'
+
+    def ready(self):
+        from mysite.sitemaps import section_invalidator
+        from .models import Article, Author, Category, Tag
+        from .search import index_article, remove_article
+        from .signals import article_relation_changed, article_tags_changed
+
+        invalidate_sitemap = section_invalidator("blog")
+        post_save.connect(invalidate_sitemap, sender=Article, weak=False)
+        post_delete.connect(invalidate_sitemap, sender=Article, weak=False)
+        post_save.connect(index_article, sender=Article)
+        post_delete.connect(remove_article, sender=Article)
+        m2m_changed.connect(article_tags_changed, sender=Article.tags.through)
+        for sender in Author, Category, Tag:
+            post_save.connect(article_relation_changed, sender=sender)
+            pre_delete.connect(article_relation_changed, sender=sender)
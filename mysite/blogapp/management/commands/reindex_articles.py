@@ -0,0 +1,44 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from blogapp.models import Article
+from blogapp.search import get_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text search index of published articles
+    """
+    help = "Rebuilds the blog search index, reading articles in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        backend = get_backend()
+        backend.create()
+        rows = (
+            Article.objects
+            .filter(pub_date__isnull=False)
+            .order_by("pk")
+            .values_list("pk", "title", "content")
+            .iterator(chunk_size=batch_size)
+        )
+
+        indexed = 0
+        with transaction.atomic():
+            backend.clear()
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    backend.index(batch)
+                    indexed += len(batch)
+                    batch = []
+                    self.stdout.write(f"Indexed {indexed} articles")
+            if batch:
+                backend.index(batch)
+                indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {indexed} articles indexed"))
@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand
+
+from blogapp.models import Article
+
+
+class Command(BaseCommand):
+    """
+    Renders the content of articles whose stored HTML is out of date
+    """
+    help = "Re-renders article content after a renderer version change"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--force", action="store_true", help="render all articles")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        articles = Article.objects.order_by("pk").only("pk", "content", "content_hash")
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(articles.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            if options["force"]:
+                for article in batch:
+                    article.content_hash = ""
+            changed = [article for article in batch if article.render()]
+            if changed:
+                Article.objects.bulk_update(changed, ["content_html", "toc", "content_hash"])
+                rendered += len(changed)
+                self.stdout.write(f"Rendered {rendered} articles")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {rendered} articles rendered"))
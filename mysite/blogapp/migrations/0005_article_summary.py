@@ -0,0 +1,30 @@
+# Generated by Django 4.2.2 on 2026-10-19 19:01
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_summary(apps, schema_editor):
+    Article = apps.get_model("blogapp", "Article")
+    Article.objects.update(summary=Substr(Coalesce("content", Value("")), 1, 200))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0004_article_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('pub_date__isnull', False)), fields=['-pub_date'], name='blogapp_article_published_idx'),
+        ),
+    ]
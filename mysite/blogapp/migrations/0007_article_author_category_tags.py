@@ -0,0 +1,33 @@
+# Generated by Django 4.2.2 on 2026-10-19 19:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0006_article_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='articles', to='blogapp.author'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='articles', to='blogapp.category'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='articles', to='blogapp.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('pub_date__isnull', False)), fields=['category', '-pub_date', '-id'], name='blogapp_article_category_idx'),
+        ),
+    ]
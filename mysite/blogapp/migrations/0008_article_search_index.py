@@ -0,0 +1,48 @@
+# Generated by Django 4.2.2 on 2026-10-19 12:00
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from blogapp.search import BACKENDS
+
+    connection = schema_editor.connection
+    if connection.vendor not in BACKENDS:
+        return
+    backend = BACKENDS[connection.vendor](connection)
+    backend.create()
+
+    # existing published articles, so they can be found right after deploy
+    Article = apps.get_model("blogapp", "Article")
+    articles = (
+        Article.objects.using(connection.alias)
+        .filter(pub_date__isnull=False)
+        .values_list("pk", "title", "content")
+        .iterator(chunk_size=1000)
+    )
+    rows = []
+    for row in articles:
+        rows.append(row)
+        if len(rows) == 1000:
+            backend.index(rows)
+            rows = []
+    if rows:
+        backend.index(rows)
+
+
+def drop_search_index(apps, schema_editor):
+    from blogapp.search import BACKENDS
+
+    if schema_editor.connection.vendor in BACKENDS:
+        BACKENDS[schema_editor.connection.vendor](schema_editor.connection).drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogapp', '0007_article_author_category_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,6 +1,68 @@
 from django.db import models
+from django.db.models import Prefetch, Q, Value
+from django.db.models.functions import Coalesce, Substr
 from django.urls import reverse
 
+from mysite.timestamps import UpdatedAtQuerySet
+from .rendering import content_hash, render_content
+from .search import index_article_pks
+
+SUMMARY_LENGTH = 200
+
+
+def make_summary(content) -> str:
+    return (content or "")[:SUMMARY_LENGTH]
+
+
+class ArticleQuerySet(UpdatedAtQuerySet):
+    """
+    Keeps the stored `summary`, rendered content and search index in sync
+    with `content` in bulk updates and bulk inserts.
+    """
+    indexed_fields = {"title", "content", "pub_date"}
+
+    def update(self, **kwargs):
+        if "content" in kwargs and "summary" not in kwargs:
+            content = kwargs["content"]
+            if hasattr(content, "resolve_expression"):
+                kwargs["summary"] = Substr(Coalesce(content, Value("")), 1, SUMMARY_LENGTH)
+                # rendered lazily on the next view
+                kwargs["content_hash"] = ""
+            else:
+                kwargs["summary"] = make_summary(content)
+                rendered = render_content(content or "")
+                kwargs.update(content_html=rendered.html, toc=rendered.toc, content_hash=content_hash(content or ""))
+        if not self.indexed_fields & set(kwargs):
+            return super().update(**kwargs)
+        pks = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        index_article_pks(pks)
+        return rows
+
+    def published(self):
+        return self.filter(pub_date__isnull=False).order_by("-pub_date", "-pk")
+
+    def for_list(self):
+        """
+        Fields and relations shown in article lists: author and category
+        are joined, tags are loaded with one query for the whole page.
+        """
+        return (
+            self
+            .select_related("author", "category")
+            .prefetch_related(Prefetch("tags", queryset=Tag.objects.only("name").order_by("name")))
+            .only("pk", "title", "summary", "pub_date", "author__name", "category__name")
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.summary = make_summary(obj.content)
+            obj.render()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        index_article_pks([obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
 class Author(models.Model):
     name = models.CharField(max_length=100)
     bio = models.TextField()
@@ -24,13 +86,59 @@ class Tag(models.Model):
 class Article(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField(null=True, blank=True)
+    # the beginning of content for lists and feeds, which never load content
+    summary = models.CharField(max_length=SUMMARY_LENGTH, blank=True, editable=False)
+    # content rendered by blogapp.rendering, up to date while content_hash matches
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     pub_date = models.DateTimeField(null=True, blank=True)
-    # author = models.ForeignKey(Author, on_delete=models.CASCADE)
-    # category = models.ForeignKey(Category, on_delete=models.CASCADE)
-    # tags = models.ManyToManyField(Tag, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    author = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True, blank=True, related_name="articles")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="articles")
+    tags = models.ManyToManyField(Tag, blank=True, related_name="articles")
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-pub_date"],
+                name="blogapp_article_published_idx",
+                condition=Q(pub_date__isnull=False),
+            ),
+            # category archive, ordered like the keyset pagination
+            models.Index(
+                fields=["category", "-pub_date", "-id"],
+                name="blogapp_article_category_idx",
+                condition=Q(pub_date__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def render(self) -> bool:
+        """
+        Renders content unless the stored result is up to date,
+        returns True if it was rendered.
+        """
+        current_hash = content_hash(self.content or "")
+        if self.content_hash == current_hash:
+            return False
+        rendered = render_content(self.content or "")
+        self.content_html = rendered.html
+        self.toc = rendered.toc
+        self.content_hash = current_hash
+        return True
+
+    def save(self, *args, **kwargs):
+        self.summary = make_summary(self.content)
+        self.render()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "summary", "content_html", "toc", "content_hash"}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse("blogapp:article", kwargs={"pk": self.pk})
\ No newline at end of file
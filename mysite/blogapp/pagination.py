@@ -0,0 +1,41 @@
+"""
+Keyset pagination of published articles.
+
+A page is selected with WHERE (pub_date, pk) < (cursor) instead of OFFSET,
+so deep pages cost the same as the first one and no COUNT(*) is needed.
+The cursor is the (pub_date, pk) of the last article of the previous page.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+
+def encode_cursor(pub_date: datetime, pk: int) -> str:
+    return urlsafe_b64encode(f"{pub_date.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    try:
+        pub_date, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(pub_date), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset: QuerySet, cursor: Optional[str], size: int) -> Tuple[List, Optional[str]]:
+    """
+    Page of the queryset ordered by -pub_date, -pk after the cursor,
+    and the cursor of the next page (None on the last page).
+    """
+    queryset = queryset.order_by("-pub_date", "-pk")
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        pub_date, pk = position
+        queryset = queryset.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+    objects = list(queryset[:size + 1])
+    if len(objects) <= size:
+        return objects, None
+    objects = objects[:size]
+    return objects, encode_cursor(objects[-1].pub_date, objects[-1].pk)
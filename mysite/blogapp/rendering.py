@@ -0,0 +1,155 @@
+"""
+Rendering of article content to HTML.
+
+Content is written in a small markdown subset: `#` headings, paragraphs,
+`-`/`1.` lists, `>` quotes, fenced code blocks, `code`, **bold**, *italic*
+and [links](https://example.com). Everything else is escaped, so the
+result is safe to show as is. Links are limited to http(s), mailto and
+relative URLs.
+
+Rendering is done once per content: the result is stored on the article
+together with the hash of the content and `RENDERER_VERSION`, and cached
+by that hash. Bump `RENDERER_VERSION` when the output changes and run
+`rerender_articles`.
+"""
+import hashlib
+import re
+from typing import Dict, List, NamedTuple
+
+from django.core.cache import cache
+from django.utils.html import escape
+from django.utils.text import slugify
+
+RENDERER_VERSION = 1
+RENDER_CACHE_TIMEOUT = 24 * 60 * 60
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+UNORDERED_ITEM_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+ORDERED_ITEM_RE = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+QUOTE_RE = re.compile(r"^\s*>\s?(.*)$")
+FENCE_RE = re.compile(r"^\s*```")
+
+CODE_SPAN_RE = re.compile(r"`([^`]+)`")
+LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+ITALIC_RE = re.compile(r"\*(.+?)\*")
+PLACEHOLDER_RE = re.compile("\x00(\\d+)\x00")
+
+
+class RenderedContent(NamedTuple):
+    html: str
+    toc: List[Dict]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(f"{RENDERER_VERSION}:{content}".encode()).hexdigest()
+
+
+def is_safe_url(url: str) -> bool:
+    return ":" not in url.split("/", 1)[0] or url.lower().startswith(("http:", "https:", "mailto:"))
+
+
+def render_inline(text: str) -> str:
+    # code spans are not processed further
+    code_spans = []
+
+    def keep_code(match: re.Match) -> str:
+        code_spans.append(f"<code>{escape(match.group(1))}</code>")
+        return f"\x00{len(code_spans) - 1}\x00"
+
+    text = escape(CODE_SPAN_RE.sub(keep_code, text))
+
+    def link(match: re.Match) -> str:
+        label, url = match.groups()
+        if not is_safe_url(url):
+            return label
+        return f'<a href="{url}" rel="nofollow noopener">{label}</a>'
+
+    text = LINK_RE.sub(link, text)
+    text = BOLD_RE.sub(r"<strong>\1</strong>", text)
+    text = ITALIC_RE.sub(r"<em>\1</em>", text)
+    return PLACEHOLDER_RE.sub(lambda match: code_spans[int(match.group(1))], text)
+
+
+def render_markdown(content: str) -> RenderedContent:
+    html = []
+    toc = []
+    anchors = set()
+    paragraph = []
+    # NUL marks code span placeholders in render_inline()
+    lines = (content or "").replace("\x00", "").replace("\r\n", "\n").split("\n")
+
+    def close_paragraph():
+        if paragraph:
+            html.append(f"<p>{render_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+
+    def heading_anchor(title: str) -> str:
+        base = slugify(title, allow_unicode=True) or "section"
+        anchor, number = base, 1
+        while anchor in anchors:
+            number += 1
+            anchor = f"{base}-{number}"
+        anchors.add(anchor)
+        return anchor
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+
+        if FENCE_RE.match(line):
+            close_paragraph()
+            code = []
+            index += 1
+            while index < len(lines) and not FENCE_RE.match(lines[index]):
+                code.append(lines[index])
+                index += 1
+            html.append(f"<pre><code>{escape(chr(10).join(code))}</code></pre>")
+            index += 1
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            close_paragraph()
+            level = len(heading.group(1))
+            title = heading.group(2)
+            anchor = heading_anchor(title)
+            toc.append({"level": level, "anchor": anchor, "title": title})
+            html.append(f'<h{level} id="{anchor}">{render_inline(title)}</h{level}>')
+            index += 1
+            continue
+
+        for item_re, tag in (UNORDERED_ITEM_RE, "ul"), (ORDERED_ITEM_RE, "ol"), (QUOTE_RE, "blockquote"):
+            if item_re.match(line):
+                close_paragraph()
+                items = []
+                while index < len(lines) and item_re.match(lines[index]):
+                    items.append(item_re.match(lines[index]).group(1))
+                    index += 1
+                if tag == "blockquote":
+                    html.append(f"<blockquote>{render_markdown(chr(10).join(items)).html}</blockquote>")
+                else:
+                    html.append(f"<{tag}>{''.join(f'<li>{render_inline(item)}</li>' for item in items)}</{tag}>")
+                break
+        else:
+            if line.strip():
+                paragraph.append(line.strip())
+            else:
+                close_paragraph()
+            index += 1
+
+    close_paragraph()
+    return RenderedContent("\n".join(html), toc)
+
+
+def render_content(content: str) -> RenderedContent:
+    """
+    Rendered content, cached by the hash of the content and the renderer version.
+    """
+    key = f"article-render:{content_hash(content)}"
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = render_markdown(content)
+        cache.set(key, tuple(rendered), RENDER_CACHE_TIMEOUT)
+        return rendered
+    return RenderedContent(*rendered)
@@ -0,0 +1,212 @@
+"""
+Full-text search of published articles.
+
+The index lives next to the article table: an FTS5 virtual table on SQLite,
+a table with a GIN-indexed tsvector on PostgreSQL. Both backends have the
+same API, results are ranked (bm25 / ts_rank_cd, title weighted above the
+content) and come with a highlighted snippet.
+
+Articles are indexed on save, bulk update and bulk insert and removed on
+delete or when unpublished; `reindex_articles` rebuilds the whole index.
+"""
+import re
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+from django.db import connection as default_connection
+from django.utils.html import escape
+
+INDEX_TABLE = "blogapp_article_search"
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+TERM_RE = re.compile(r"\w+")
+
+
+class SearchResult(NamedTuple):
+    pk: int
+    rank: float
+    snippet: str
+
+
+def highlight(snippet: str) -> str:
+    """
+    Escapes the snippet and marks the matched terms.
+    """
+    return (
+        escape(snippet or "")
+        .replace(SNIPPET_START, "<mark>")
+        .replace(SNIPPET_END, "</mark>")
+    )
+
+
+class SQLiteSearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} "
+                f"USING fts5(title, content, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+
+    def remove(self, pks: Sequence[int]):
+        if not pks:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {INDEX_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(pks))})",
+                list(pks),
+            )
+
+    def index(self, rows: Sequence[Tuple[int, str, str]]):
+        self.remove([pk for pk, _, _ in rows])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (rowid, title, content) VALUES (%s, %s, %s)",
+                [(pk, title, content or "") for pk, title, content in rows],
+            )
+
+    def search(self, terms: List[str], limit: int, offset: int) -> List[SearchResult]:
+        # every term is quoted, so user input is never parsed as FTS5 syntax
+        match = " ".join(f'"{term}"*' for term in terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({INDEX_TABLE}, 10.0, 1.0) AS rank, "
+                f"snippet({INDEX_TABLE}, -1, %s, %s, '…', 16) "
+                f"FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s "
+                f"ORDER BY rank LIMIT %s OFFSET %s",
+                [SNIPPET_START, SNIPPET_END, match, limit, offset],
+            )
+            return [SearchResult(pk, -rank, highlight(snippet)) for pk, rank, snippet in cursor.fetchall()]
+
+
+class PostgreSQLSearchBackend:
+    document = "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')"
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ("
+                f"article_id bigint PRIMARY KEY, title text NOT NULL, content text NOT NULL, "
+                f"document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_idx ON {INDEX_TABLE} USING GIN (document)"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {INDEX_TABLE}")
+
+    def remove(self, pks: Sequence[int]):
+        if not pks:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE} WHERE article_id = ANY(%s)", [list(pks)])
+
+    def index(self, rows: Sequence[Tuple[int, str, str]]):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {INDEX_TABLE} (article_id, title, content, document) "
+                f"VALUES (%s, %s, %s, {self.document}) "
+                f"ON CONFLICT (article_id) DO UPDATE SET "
+                f"title = EXCLUDED.title, content = EXCLUDED.content, document = EXCLUDED.document",
+                [(pk, title, content or "", title, content or "") for pk, title, content in rows],
+            )
+
+    def search(self, terms: List[str], limit: int, offset: int) -> List[SearchResult]:
+        query = " & ".join(f"{term}:*" for term in terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT article_id, ts_rank_cd(document, query) AS rank, "
+                f"ts_headline('simple', title || ' ' || content, query, %s) "
+                f"FROM {INDEX_TABLE}, to_tsquery('simple', %s) query "
+                f"WHERE document @@ query ORDER BY rank DESC, article_id DESC LIMIT %s OFFSET %s",
+                [
+                    f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=16, MinWords=8",
+                    query, limit, offset,
+                ],
+            )
+            return [SearchResult(pk, rank, highlight(snippet)) for pk, rank, snippet in cursor.fetchall()]
+
+
+BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgreSQLSearchBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    try:
+        return BACKENDS[connection.vendor](connection)
+    except KeyError:
+        raise NotImplementedError(f"Article search is not supported on {connection.vendor}")
+
+
+def search_terms(query: str) -> List[str]:
+    return TERM_RE.findall(query.lower())[:10]
+
+
+def search_articles(query: str, limit: int = 20, offset: int = 0) -> List[SearchResult]:
+    terms = search_terms(query)
+    if not terms:
+        return []
+    return get_backend().search(terms, limit, offset)
+
+
+def index_articles(articles: Iterable) -> None:
+    """
+    Adds published articles to the index and removes unpublished ones.
+    """
+    backend = get_backend()
+    published = []
+    unpublished = []
+    for article in articles:
+        if article.pub_date is None:
+            unpublished.append(article.pk)
+        else:
+            published.append((article.pk, article.title, article.content))
+    backend.remove(unpublished)
+    if published:
+        backend.index(published)
+
+
+def index_article_pks(pks: Sequence[int]) -> None:
+    """
+    Reindexes the articles changed by a bulk update or insert,
+    which send no post_save.
+    """
+    if not pks or default_connection.vendor not in BACKENDS:
+        return
+    from .models import Article
+
+    index_articles(Article.objects.filter(pk__in=pks).only("pk", "title", "content", "pub_date"))
+
+
+def index_article(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or default_connection.vendor not in BACKENDS:
+        return
+    if update_fields is not None and not {"title", "content", "pub_date"} & set(update_fields):
+        return
+    index_articles([instance])
+
+
+def remove_article(sender, instance, **kwargs):
+    if default_connection.vendor in BACKENDS:
+        get_backend().remove([instance.pk])
@@ -0,0 +1,33 @@
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import Article
+
+
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Tags are shown on the article pages: changing them moves
+    the `updated_at` of the articles forward.
+    """
+    # pre_clear: the cleared tags are still there to find the articles
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        articles = Article.objects.filter(pk=instance.pk)
+    elif pk_set:
+        articles = Article.objects.filter(pk__in=pk_set)
+    else:
+        articles = Article.objects.filter(tags=instance)
+    QuerySet.update(articles, updated_at=timezone.now())
+
+
+def article_relation_changed(sender, instance, created=False, **kwargs):
+    """
+    Names of the author, category and tags are shown on the article pages:
+    saving or deleting one of them moves the `updated_at` of its articles
+    forward. Connected to pre_delete, as the articles lose the relation
+    on delete.
+    """
+    if created:
+        return
+    QuerySet.update(instance.articles.all(), updated_at=timezone.now())
@@ -1,4 +1,6 @@
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+from django.urls import reverse
 
 from blogapp.models import Article
 
@@ -6,9 +8,21 @@ from blogapp.models import Article
 class BlogSitemap(Sitemap):
     changefreq = "never"
     priority = 0.5
+    limit = 10000
+
     def items(self):
         return (
             Article.objects
             .filter(pub_date__isnull=False)
-            .order_by("-pub_date")[:5]
-        )
\ No newline at end of file
+            .order_by("-pub_date", "pk")
+            .values("pk", "updated_at")
+        )
+
+    def location(self, item: dict) -> str:
+        return reverse("blogapp:article", kwargs={"pk": item["pk"]})
+
+    def lastmod(self, item: dict):
+        return item["updated_at"]
+
+    def get_latest_lastmod(self):
+        return Article.objects.aggregate(latest=Max("updated_at"))["latest"]
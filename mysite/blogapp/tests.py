@@ -1,3 +1,273 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from .models import Article, Author, Category, Tag
+from .rendering import render_markdown
+from .search import search_articles
+
+
+class ArticleSummaryTestCase(TestCase):
+    def test_summary_is_stored_on_save(self):
+        article = Article.objects.create(title="Long", content="x" * 300, pub_date=timezone.now())
+        self.assertEqual(article.summary, "x" * 200)
+
+        article.content = "short"
+        article.save(update_fields=["content"])
+        article.refresh_from_db()
+        self.assertEqual(article.summary, "short")
+
+    def test_summary_follows_bulk_changes(self):
+        Article.objects.bulk_create([Article(title="Bulk", content="bulk content")])
+        self.assertEqual(Article.objects.get().summary, "bulk content")
+
+        Article.objects.update(content="updated")
+        self.assertEqual(Article.objects.get().summary, "updated")
+
+        Article.objects.update(content=F("title"))
+        self.assertEqual(Article.objects.get().summary, "Bulk")
+
+
+class ArticlesListViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Article.objects.bulk_create(
+            Article(title=f"Article {number}", content=f"Content {number}", pub_date=now)
+            for number in range(25)
+        )
+        Article.objects.create(title="Draft", content="Not published")
+
+    def test_list_is_paginated_without_content(self):
+        with translation.override("en"):
+            url = reverse("blogapp:articles")
+        # count, page, tags
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.6.0.1')
+        self.assertEqual(len(response.context["object_list"]), 20)
+        self.assertTrue(response.context["is_paginated"])
+        self.assertNotContains(response, "Draft")
+        article = response.context["object_list"][0]
+        self.assertIn("content", article.get_deferred_fields())
+
+
+class ArticleRenderingTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_markdown_is_rendered_and_sanitized(self):
+        rendered = render_markdown(
+            "# Intro\n"
+            "Some **bold** and `<b>code</b>` text.\n"
+            "<script>alert(1)</script>\n\n"
+            "## Intro\n"
+            "- [site](https://example.com)\n"
+            "- [bad](javascript:alert(1))\n"
+        )
+        self.assertIn('<h1 id="intro">Intro</h1>', rendered.html)
+        self.assertIn('<h2 id="intro-2">Intro</h2>', rendered.html)
+        self.assertIn("<strong>bold</strong>", rendered.html)
+        self.assertIn("<code>&lt;b&gt;code&lt;/b&gt;</code>", rendered.html)
+        self.assertIn("&lt;script&gt;", rendered.html)
+        self.assertIn('<a href="https://example.com" rel="nofollow noopener">site</a>', rendered.html)
+        self.assertNotIn("javascript:", rendered.html)
+        self.assertEqual(
+            rendered.toc,
+            [
+                {"level": 1, "anchor": "intro", "title": "Intro"},
+                {"level": 2, "anchor": "intro-2", "title": "Intro"},
+            ],
+        )
+
+    def test_content_is_rendered_on_save_only_when_changed(self):
+        article = Article.objects.create(title="Rendered", content="# Title\ntext")
+        self.assertIn('<h1 id="title">Title</h1>', article.content_html)
+        self.assertEqual(len(article.toc), 1)
+        self.assertFalse(article.render())
+
+        Article.objects.update(content="*changed*")
+        article.refresh_from_db()
+        self.assertEqual(article.content_html, "<p><em>changed</em></p>")
+
+    def test_stale_articles_are_rerendered(self):
+        article = Article.objects.create(title="Stale", content="text", pub_date=timezone.now())
+        Article.objects.update(content=F("title"))
+        Article.objects.create(title="Fresh", content="fresh")
+
+        call_command("rerender_articles", stdout=StringIO())
+
+        article.refresh_from_db()
+        self.assertEqual(article.content_html, "<p>Stale</p>")
+        self.assertFalse(article.render())
+
+
+class ArticleRelationsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Writer", bio="")
+        cls.category = Category.objects.create(name="News")
+        cls.tags = Tag.objects.bulk_create([Tag(name="python"), Tag(name="django")])
+        cls.tag = cls.tags[0]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_articles(self, count: int, start: int = 0):
+        now = timezone.now()
+        for number in range(start, start + count):
+            article = Article.objects.create(
+                title=f"Article {number}",
+                content="text",
+                pub_date=now - timezone.timedelta(minutes=number % 3),
+                author=self.author,
+                category=self.category,
+            )
+            article.tags.set(self.tags)
+
+    def get(self, url_name: str, address: str, **kwargs):
+        with translation.override("en"):
+            url = reverse(url_name, kwargs=kwargs)
+        return self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR=address)
+
+    def test_list_runs_constant_queries(self):
+        self.create_articles(2)
+        # count, page, tags
+        with self.assertNumQueries(3):
+            self.get("blogapp:articles", "10.7.0.1")
+
+        self.create_articles(18, start=2)
+        with self.assertNumQueries(3):
+            response = self.get("blogapp:articles", "10.7.0.2")
+        self.assertContains(response, "Writer", count=20)
+        self.assertContains(response, "django", count=20)
+
+    def test_archives_are_paginated_by_keyset(self):
+        self.create_articles(45)
+        seen = []
+        cursor = None
+        for page in range(3):
+            with translation.override("en"):
+                url = reverse("blogapp:tag-articles", kwargs={"pk": self.tag.pk})
+            # tag, page, tags
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    url, {"after": cursor} if cursor else {},
+                    HTTP_USER_AGENT='test-agent', REMOTE_ADDR=f'10.7.1.{page}',
+                )
+            seen += [article.pk for article in response.context["object_list"]]
+            cursor = response.context["next_cursor"]
+        self.assertIsNone(cursor)
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+
+        response = self.get("blogapp:category-articles", "10.7.2.1", pk=self.category.pk)
+        self.assertEqual(len(response.context["object_list"]), 20)
+        self.assertContains(response, "News")
+
+
+class ArticleSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        now = timezone.now()
+        self.in_title = Article.objects.create(title="Django caching", content="About performance", pub_date=now)
+        self.in_content = Article.objects.create(
+            title="Performance",
+            content="Use the <b>cache</b> framework of django for caching pages",
+            pub_date=now,
+        )
+        self.draft = Article.objects.create(title="Draft about django", content="Not published")
+
+    def test_results_are_ranked_and_highlighted(self):
+        results = search_articles("django caching")
+
+        self.assertEqual([result.pk for result in results], [self.in_title.pk, self.in_content.pk])
+        self.assertIn("<mark>django</mark>", results[1].snippet.lower())
+        self.assertIn("&lt;b&gt;", results[1].snippet)
+        self.assertEqual(search_articles('"); DROP TABLE x; --'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.in_content.title = "Renamed"
+        self.in_content.content = "nothing here"
+        self.in_content.save()
+        self.assertEqual([result.pk for result in search_articles("caching")], [self.in_title.pk])
+
+        self.draft.pub_date = timezone.now()
+        self.draft.save()
+        self.assertEqual([result.pk for result in search_articles("draft")], [self.draft.pk])
+
+        self.draft.delete()
+        self.assertEqual(search_articles("draft"), [])
+
+    def test_index_follows_bulk_changes(self):
+        Article.objects.filter(pk=self.in_title.pk).update(content="zebra")
+        self.assertEqual([result.pk for result in search_articles("zebra")], [self.in_title.pk])
+        self.assertEqual([result.pk for result in search_articles("about")], [])
+
+        Article.objects.filter(pk=self.in_content.pk).update(pub_date=None)
+        self.assertEqual(search_articles("framework"), [])
+
+        [bulk] = Article.objects.bulk_create([Article(title="Bulk giraffe", pub_date=timezone.now())])
+        self.assertEqual([result.pk for result in search_articles("giraffe")], [bulk.pk])
+
+    def test_reindex_and_search_view(self):
+        Article.objects.filter(pk=self.in_title.pk).update(title="Reindexed title")
+        call_command("reindex_articles", batch_size=1, stdout=StringIO())
+
+        with translation.override("en"):
+            url = reverse("blogapp:articles-search")
+        response = self.client.get(url, {"q": "reindexed"}, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.8.0.1')
+
+        results = response.json()["results"]
+        self.assertEqual([result["id"] for result in results], [self.in_title.pk])
+        self.assertEqual(results[0]["title"], "Reindexed title")
+
+
+class ArticleConditionalGetTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.article = Article.objects.create(title="Cached", content="text", pub_date=timezone.now())
+        with translation.override("en"):
+            self.url = reverse("blogapp:article", kwargs={"pk": self.article.pk})
+
+    def get(self, address: str, etag: str = None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(self.url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR=address, **headers)
+
+    def test_not_modified_until_tags_change(self):
+        etag = self.get("10.9.0.1")["ETag"]
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get("10.9.0.2", etag).status_code, 304)
+
+        self.article.tags.add(Tag.objects.create(name="new"))
+        self.assertEqual(self.get("10.9.0.3", etag).status_code, 200)
+
+    def test_not_modified_until_relations_change(self):
+        author = Author.objects.create(name="Writer", bio="")
+        tag = Tag.objects.create(name="python")
+        self.article.author = author
+        self.article.save()
+        self.article.tags.add(tag)
+        etag = self.get("10.9.2.1")["ETag"]
+
+        author.name = "Renamed"
+        author.save()
+        renamed = self.get("10.9.2.2", etag)
+        self.assertEqual(renamed.status_code, 200)
+
+        tag.delete()
+        self.assertEqual(self.get("10.9.2.3", renamed["ETag"]).status_code, 200)
+
+    def test_lazy_rerender_keeps_etag(self):
+        Article.objects.filter(pk=self.article.pk).update(content=F("title"))
+        etag = self.get("10.9.1.1")["ETag"]
+        updated_at = Article.objects.get(pk=self.article.pk).updated_at
 
-# Create your tests here.
+        self.assertEqual(self.get("10.9.1.2", etag).status_code, 304)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.content_html, "<p>Cached</p>")
+        self.assertEqual(self.article.updated_at, updated_at)
@@ -2,7 +2,10 @@ from django.urls import path, include
 from .views import (
     ArticlesListView,
     ArticlesDetailView,
+    ArticlesSearchView,
+    CategoryArticlesView,
     LatestArticlesFeed,
+    TagArticlesView,
 )
 
 app_name = "blogapp"
@@ -10,5 +13,8 @@ app_name = "blogapp"
 urlpatterns = [
     path("articles/", ArticlesListView.as_view(), name="articles"),
     path("articles/<int:pk>/", ArticlesDetailView.as_view(), name="article"),
+    path("articles/search/", ArticlesSearchView.as_view(), name="articles-search"),
+    path("articles/tag/<int:pk>/", TagArticlesView.as_view(), name="tag-articles"),
+    path("articles/category/<int:pk>/", CategoryArticlesView.as_view(), name="category-articles"),
     path("articles/latest/feed/", LatestArticlesFeed(), name="articles-feed"),
 ]
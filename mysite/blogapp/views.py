@@ -1,37 +1,151 @@
-from django.contrib.syndication.views import Feed
+from django.db.models import Prefetch, QuerySet
+from django.http import HttpRequest, JsonResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy, reverse
+from django.views import View
 from django.views.generic import ListView, DetailView
-from .models import Article
 
-class ArticlesListView(ListView):
+from mysite.conditional import ConditionalGetMixin, queryset_version
+from mysite.feeds import CachedFeed
+from .models import Article, Category, Tag
+from .pagination import keyset_page
+from .rendering import RENDERER_VERSION
+from .search import search_articles
+
+class ArticlesListView(ConditionalGetMixin, ListView):
     model = Article
     template_name = 'blogapp/article_list.html'
-    queryset = (
-        Article.objects
-        .filter(pub_date__isnull=False)
-        .order_by("-pub_date")
+    paginate_by = 20
+    queryset = Article.objects.published().for_list()
+
+    def get_version_token(self):
+        self.version = queryset_version(Article.objects.published())
+        return str(self.version)
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        # already counted by the version query
+        paginator.count = self.version.count
+        return paginator
+
+
+class ArticlesArchiveView(ListView):
+    """
+    Published articles of a tag or a category, paginated by keyset
+    with the `after` cursor.
+
+    Subclasses set `archive_model` and `archive_filter`, the Article field
+    that refers to it.
+    """
+    template_name = 'blogapp/article_archive.html'
+    archive_model = None
+    archive_filter = None
+    page_size = 20
+
+    def get_archive(self):
+        return get_object_or_404(self.archive_model.objects.only("name"), pk=self.kwargs["pk"])
+
+    def get_queryset(self):
+        return Article.objects.published().for_list().filter(**{self.archive_filter: self.archive})
+
+    def get(self, request, *args, **kwargs):
+        self.archive = self.get_archive()
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        articles, next_cursor = keyset_page(self.object_list, self.request.GET.get("after"), self.page_size)
+        return super().get_context_data(
+            object_list=articles,
+            archive=self.archive,
+            next_cursor=next_cursor,
+            **kwargs,
+        )
+
+
+class TagArticlesView(ArticlesArchiveView):
+    archive_model = Tag
+    archive_filter = "tags"
+
+
+class CategoryArticlesView(ArticlesArchiveView):
+    archive_model = Category
+    archive_filter = "category"
+
+
+class ArticlesSearchView(View):
+    """
+    Full-text search of published articles: ?q=<words>&page=<number>
+    """
+    page_size = 20
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        query = request.GET.get("q", "")
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        results = search_articles(query, limit=self.page_size, offset=(page - 1) * self.page_size)
+        articles = Article.objects.only("pk", "title", "pub_date").in_bulk([result.pk for result in results])
+        return JsonResponse({
+            "query": query,
+            "page": page,
+            "results": [
+                {
+                    "id": result.pk,
+                    "title": articles[result.pk].title,
+                    "url": articles[result.pk].get_absolute_url(),
+                    "pub_date": articles[result.pk].pub_date,
+                    "rank": result.rank,
+                    "snippet": result.snippet,
+                }
+                for result in results
+                if result.pk in articles
+            ],
+        })
+
+
+class ArticlesDetailView(ConditionalGetMixin, DetailView):
+    queryset = Article.objects.select_related("author", "category").prefetch_related(
+        Prefetch("tags", queryset=Tag.objects.only("name").order_by("name")),
     )
 
-class ArticlesDetailView(DetailView):
-    model = Article
+    def get_version_token(self):
+        updated_at = Article.objects.filter(pk=self.kwargs["pk"]).values_list("updated_at", flat=True).first()
+        # a new renderer version changes the page before the article is re-rendered
+        return updated_at and f"{self.kwargs['pk']}:{updated_at.isoformat()}:{RENDERER_VERSION}"
 
-class LatestArticlesFeed(Feed):
+    def get_object(self, queryset=None):
+        article = super().get_object(queryset)
+        # content changed by an update() with an expression, or a new renderer version;
+        # not ArticleQuerySet.update(): that update() has already moved updated_at
+        if article.render():
+            QuerySet.update(
+                Article.objects.filter(pk=article.pk),
+                content_html=article.content_html,
+                toc=article.toc,
+                content_hash=article.content_hash,
+            )
+        return article
+
+class LatestArticlesFeed(CachedFeed):
     title = "Blog articles (latest)"
     description = "Updates on changes and addition blog articles"
     link = reverse_lazy("blogapp:articles")
+    modified_model = Article
 
     def items(self):
         return (
             Article.objects
             .filter(pub_date__isnull=False)
-            .order_by("-pub_date")[:5]
+            .order_by("-pub_date", "-pk")
+            .only("pk", "title", "summary", "pub_date")[:5]
         )
 
     def item_title(self, item: Article):
         return item.title
 
     def item_description(self, item: Article):
-        return item.content[:200]
-
-
+        return item.summary
 
+    def item_pubdate(self, item: Article):
+        return item.pub_date
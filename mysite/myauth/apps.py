@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class MyauthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myauth'
+
+    def ready(self):
+        from django.contrib.auth.models import User, Group, Permission
+        from mysite.media import allow_any, register_media_access
+        from mysite.storage import release_files
+        from .models import Profile
+        from .permissions import bump_permissions_version
+        from .profiles import bump_profiles_version, create_profile
+
+        for sender in User.groups.through, User.user_permissions.through, Group.permissions.through:
+            m2m_changed.connect(bump_permissions_version, sender=sender)
+        for sender in Group, Permission:
+            post_delete.connect(bump_permissions_version, sender=sender)
+
+        post_save.connect(create_profile, sender=User)
+        post_delete.connect(release_files, sender=Profile)
+        for sender in User, Profile:
+            post_save.connect(bump_profiles_version, sender=sender)
+            post_delete.connect(bump_profiles_version, sender=sender)
+
+        register_media_access("profiles/", allow_any, public=True)
@@ -0,0 +1,14 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .permissions import get_cached_permissions
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend that takes the permission set of the user from the shared
+    cache, so `has_perm` runs no queries on warm requests.
+    """
+    def get_all_permissions(self, user_obj, obj=None):
+        if obj is not None:
+            return set()
+        return get_cached_permissions(user_obj)
@@ -1,7 +1,33 @@
 from django import forms
+from django.contrib.auth.forms import AuthenticationForm
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
 from .models import Profile
+from .throttling import login_attempt_allowed, reset_login_attempts
 
 class ProfileUpdateForm(forms.ModelForm):
     class Meta:
         model = Profile
-        fields = "user", "avatar"
\ No newline at end of file
+        fields = "bio", "avatar"
+
+
+class ThrottledAuthenticationForm(AuthenticationForm):
+    """
+    Rejects the login before checking the password when there were
+    too many attempts for the username or from the client address.
+    """
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        "too_many_attempts": _("Too many login attempts. Try again later."),
+    }
+
+    def clean(self):
+        username = self.cleaned_data.get("username")
+        if username and self.request is not None:
+            if not login_attempt_allowed(self.request, username):
+                raise ValidationError(self.error_messages["too_many_attempts"], code="too_many_attempts")
+        cleaned_data = super().clean()
+        if self.request is not None and self.user_cache is not None:
+            reset_login_attempts(self.request, username)
+        return cleaned_data
@@ -0,0 +1,46 @@
+"""
+Password hashers with the cost set in settings.
+
+`PASSWORD_HASHER` selects the algorithm used for new hashes and
+`PASSWORD_HASHER_PARAMS` ("work_factor=65536,parallelism=2") tunes its cost.
+Hashes made with another algorithm or cost are upgraded on the next
+successful login by `check_password`.
+"""
+from typing import Dict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def parse_params(value: str) -> Dict[str, int]:
+    """
+    Parses "work_factor=65536,parallelism=2" into
+    {"work_factor": 65536, "parallelism": 2}.
+    """
+    params = {}
+    for item in value.split(","):
+        name, sep, number = item.partition("=")
+        if sep and name.strip():
+            params[name.strip()] = int(number)
+    return params
+
+
+class TunedHasherMixin:
+    def __init__(self):
+        if self.algorithm == settings.PASSWORD_HASHER:
+            for name, value in parse_params(settings.PASSWORD_HASHER_PARAMS).items():
+                if not hasattr(self, name):
+                    raise ValueError(f"{type(self).__name__} has no parameter {name!r}")
+                setattr(self, name, value)
+
+
+class PBKDF2PasswordHasher(TunedHasherMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(TunedHasherMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(TunedHasherMixin, hashers.Argon2PasswordHasher):
+    pass
@@ -0,0 +1,41 @@
+from timeit import default_timer
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.core.management import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from myauth.throttling import login_attempt_allowed
+
+
+class Command(BaseCommand):
+    """
+    Measures password checks per second on one core for the configured
+    hasher and the cost of a throttled login attempt
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=3.0)
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        encoded = make_password("Pas$w0rd", hasher=hasher)
+        self.stdout.write(f"Hasher {hasher.algorithm}: {hasher.safe_summary(encoded)}")
+
+        rate = self.measure(lambda: check_password("Pas$w0rd", encoded), options["seconds"])
+        self.stdout.write(f"Password checks: {rate:.1f} logins/s per core")
+
+        request = RequestFactory().post("/", REMOTE_ADDR="10.255.255.255")
+        locmem = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(CACHES={**settings.CACHES, "default": locmem}):
+            rate = self.measure(lambda: login_attempt_allowed(request, "bench_login"), options["seconds"])
+        self.stdout.write(f"Throttled attempts: {rate:.0f} rejections/s per core")
+
+    def measure(self, func, seconds: float) -> float:
+        func()
+        count = 0
+        started = default_timer()
+        while default_timer() - started < seconds:
+            func()
+            count += 1
+        return count / (default_timer() - started)
@@ -0,0 +1,73 @@
+import contextlib
+import io
+from timeit import default_timer
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+# a copy of the sessions cache under its own key prefix,
+# so the benchmark never touches the sessions of real users
+BENCH_CACHE_ALIAS = "bench_sessions"
+
+ENGINES = [
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+    "django.contrib.sessions.backends.cache",
+]
+
+
+class Command(BaseCommand):
+    """
+    Compares throughput of authenticated requests
+    with the database, cached_db and cache session engines
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--engine", action="append", choices=ENGINES, help="engines to compare (default: all)")
+
+    def handle(self, *args, **options):
+        # a new user, so that the one deleted below is never a real account;
+        # not a rolled back transaction, which would skip the commits being measured
+        user = User.objects.create(username=f"bench_sessions_{get_random_string(8)}")
+        url = reverse("myauth:session-get")
+        bench_cache = {**caches.settings["sessions"], "KEY_PREFIX": BENCH_CACHE_ALIAS}
+        results = {}
+        try:
+            for engine in options["engine"] or ENGINES:
+                with override_settings(
+                    SESSION_ENGINE=engine,
+                    SESSION_CACHE_ALIAS=BENCH_CACHE_ALIAS,
+                    CACHES={**caches.settings, BENCH_CACHE_ALIAS: bench_cache},
+                ):
+                    results[engine] = self.measure(user, url, options["requests"])
+        finally:
+            user.delete()
+
+        self.stdout.write(f"{options['requests']} authenticated GET {url}")
+        for engine, rate in results.items():
+            self.stdout.write(f"{engine}: {rate:.0f} requests/s")
+
+    def measure(self, user: User, url: str, requests: int) -> float:
+        client = Client(HTTP_USER_AGENT="bench_sessions", HTTP_HOST="127.0.0.1")
+        client.force_login(user)
+
+        def get(number: int):
+            # CountRequestMiddleware throttles repeated requests from one address
+            address = f"10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}"
+            client.get(url, REMOTE_ADDR=address)
+
+        # request middlewares print on every request
+        with contextlib.redirect_stdout(io.StringIO()):
+            get(0)
+            started = default_timer()
+            for number in range(1, requests + 1):
+                get(number)
+            elapsed = default_timer() - started
+        # only the session of the benchmark, from the cache and the database
+        client.session.delete()
+        return requests / elapsed
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from myauth.sessions import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired sessions in batches
+    """
+    help = "Deletes expired sessions in batches (a non-locking clearsessions)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = clear_expired_sessions(
+            batch_size=options["batch_size"],
+            on_batch=lambda count: self.stdout.write(f"Deleted {count} sessions"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done, {deleted} expired sessions deleted"))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    Profile = apps.get_model("myauth", "Profile")
+    Profile.objects.bulk_create(
+        Profile(user_id=pk)
+        for pk in User.objects.filter(profile__isnull=True).values_list("pk", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myauth', '0002_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.2 on 2026-10-19 19:16
+
+from django.db import migrations, models
+import myauth.models
+import mysite.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myauth', '0003_create_missing_profiles'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=mysite.storage.get_content_storage, upload_to=myauth.models.upload_avatar_to),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.contrib.auth.mixins import UserPassesTestMixin
+
+
+class ObjectPermissionMixin(UserPassesTestMixin):
+    """
+    Checks access to the object of a detail/update view.
+
+    The object is loaded once per request and shared by the permission check
+    and the view itself. With CachedPermissionBackend the check itself
+    runs no queries.
+    """
+    permission_required = None
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def has_permission(self) -> bool:
+        user = self.request.user
+        return user.is_superuser or (
+            self.permission_required is not None
+            and user.has_perm(self.permission_required)
+        )
+
+    def has_object_permission(self, obj) -> bool:
+        return False
+
+    def test_func(self):
+        return self.has_permission() or self.has_object_permission(self.get_object())
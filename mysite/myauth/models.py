@@ -1,14 +1,19 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+from mysite.storage import get_content_storage
+from .thumbnails import get_thumbnail_url
+
 def upload_avatar_to(instance: "Profile", filename: str) -> str:
-    return "profiles/user_{pk}/avatar/{filename}".format(
-        pk=instance.pk,
-        filename=filename,
-    )
+    # the storage replaces the file name with the hash of the content
+    return "profiles/avatars/{filename}".format(filename=filename)
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
     agreement_accepted = models.BooleanField(default=False)
-    avatar = models.ImageField(null=True, blank=True, upload_to=upload_avatar_to)
+    avatar = models.ImageField(null=True, blank=True, upload_to=upload_avatar_to, storage=get_content_storage)
+
+    @property
+    def avatar_thumbnail_url(self) -> str:
+        return get_thumbnail_url(self.avatar) if self.avatar else ""
@@ -0,0 +1,41 @@
+"""
+Permission sets cached in the shared cache.
+
+The cache key carries a global permissions version that is bumped whenever
+user groups, user permissions or group permissions change, so a cached set
+is never used after such a change. A superuser has every permission, so
+`is_superuser` is part of the key as well: a demoted user gets a new set.
+"""
+import time
+from typing import Set
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+PERMISSIONS_VERSION_KEY = "permissions:version"
+PERMISSIONS_CACHE_TIMEOUT = 60 * 60
+
+
+def permissions_version() -> int:
+    return cache.get_or_set(PERMISSIONS_VERSION_KEY, time.time_ns, None)
+
+
+def bump_permissions_version(**kwargs) -> None:
+    cache.set(PERMISSIONS_VERSION_KEY, time.time_ns(), None)
+
+
+def get_cached_permissions(user) -> Set[str]:
+    """
+    All permissions of the user as "app_label.codename" strings,
+    memoized on the user object for the request and cached across requests.
+    """
+    if not user.is_active or user.is_anonymous:
+        return set()
+    if not hasattr(user, "_cached_perms"):
+        key = f"permissions:{permissions_version()}:{user.pk}:{int(user.is_superuser)}"
+        perms = cache.get(key)
+        if perms is None:
+            perms = ModelBackend().get_all_permissions(user)
+            cache.set(key, perms, PERMISSIONS_CACHE_TIMEOUT)
+        user._cached_perms = perms
+    return user._cached_perms
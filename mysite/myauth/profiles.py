@@ -0,0 +1,30 @@
+"""
+Profile creation and the version of the cached profiles list.
+
+Every user gets a profile when created, so views and templates can rely
+on `user.profile`. The cached profiles list carries a version that is
+bumped whenever a profile or a user changes.
+"""
+import time
+
+from django.core.cache import cache
+
+from .models import Profile
+
+PROFILES_VERSION_KEY = "profiles:version"
+
+
+def profiles_version() -> int:
+    return cache.get_or_set(PROFILES_VERSION_KEY, time.time_ns, None)
+
+
+def bump_profiles_version(update_fields=None, **kwargs) -> None:
+    # every login saves last_login, which is not shown in the list
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    cache.set(PROFILES_VERSION_KEY, time.time_ns(), None)
+
+
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.create(user=instance)
@@ -0,0 +1,39 @@
+from importlib import import_module
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.utils import timezone
+
+
+def get_session_store_class(engine: str = None):
+    return import_module(engine or settings.SESSION_ENGINE).SessionStore
+
+
+def clear_expired_sessions(
+    batch_size: int = 1000,
+    engine: str = None,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Deletes expired sessions in batches of `batch_size` rows, so the session
+    table is not locked for the whole cleanup like with `clearsessions`.
+    Returns the number of deleted sessions.
+
+    Sessions of non-database engines expire in their store by themselves.
+    """
+    store_class = get_session_store_class(engine)
+    if not issubclass(store_class, DBSessionStore):
+        store_class.clear_expired()
+        return 0
+
+    expired = store_class.get_model_class().objects.filter(expire_date__lt=timezone.now())
+    deleted = 0
+    while True:
+        keys = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        count, _ = expired.filter(pk__in=keys).delete()
+        deleted += count
+        if on_batch:
+            on_batch(count)
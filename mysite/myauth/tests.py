@@ -1,5 +1,22 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group, Permission
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone, translation
+from PIL import Image
+
+from .forms import ThrottledAuthenticationForm
+from .models import Profile
+from .permissions import get_cached_permissions
+from .profiles import profiles_version
+from .sessions import clear_expired_sessions
 
 
 class GetCookieViewTestCase(TestCase):
@@ -16,3 +33,256 @@ class FooBarViewTestCase(TestCase):
         )
         expected_data = {"foo": "bar", "span": "eggs"}
         self.assertJSONEqual(response.content, expected_data)
+
+
+class ProfileUpdateViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="profile_owner", password="Pas$w0rd")
+        cls.profile = cls.user.profile
+        other = User.objects.create_user(username="profile_other", password="Pas$w0rd")
+        cls.other_profile = other.profile
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_owner_can_update(self):
+        response = self.client.get(
+            reverse("myauth:profile_update", kwargs={"pk": self.profile.pk}),
+            HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.1.0.1',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_user_cannot_update(self):
+        response = self.client.get(
+            reverse("myauth:profile_update", kwargs={"pk": self.other_profile.pk}),
+            HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.1.0.2',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class CachedPermissionsTestCase(TestCase):
+    def test_permissions_are_cached_until_groups_change(self):
+        cache.clear()
+        user = User.objects.create_user(username="perm_user", password="Pas$w0rd")
+        self.assertNotIn("myauth.view_profile", get_cached_permissions(user))
+
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(0):
+            get_cached_permissions(user)
+
+        group = Group.objects.create(name="profile_viewers")
+        group.permissions.add(Permission.objects.get(codename="view_profile"))
+        user.groups.add(group)
+
+        user = User.objects.get(pk=user.pk)
+        self.assertIn("myauth.view_profile", get_cached_permissions(user))
+
+    def test_demoted_superuser_loses_permissions(self):
+        cache.clear()
+        user = User.objects.create_superuser(username="demoted_user", password="Pas$w0rd")
+        self.assertIn("shopapp.delete_product", get_cached_permissions(User.objects.get(pk=user.pk)))
+
+        user.is_superuser = False
+        user.save()
+
+        user = User.objects.get(pk=user.pk)
+        self.assertNotIn("shopapp.delete_product", get_cached_permissions(user))
+        self.assertFalse(user.has_perm("shopapp.delete_product"))
+
+    def test_has_perm_without_queries_on_warm_cache(self):
+        cache.clear()
+        user = User.objects.create_user(username="warm_user", password="Pas$w0rd")
+        user.user_permissions.add(Permission.objects.get(codename="view_profile"))
+        User.objects.get(pk=user.pk).has_perm("myauth.view_profile")
+
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("myauth.view_profile"))
+            self.assertFalse(user.has_perm("myauth.change_profile"))
+
+
+class SessionsTestCase(TestCase):
+    def test_clear_expired_sessions_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(days=1))
+            for i in range(5)
+        )
+        Session.objects.create(session_key="alive", session_data="", expire_date=now + timedelta(days=1))
+        batches = []
+
+        deleted = clear_expired_sessions(
+            batch_size=2,
+            engine="django.contrib.sessions.backends.db",
+            on_batch=batches.append,
+        )
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(batches, [2, 2, 1])
+        self.assertQuerysetEqual(Session.objects.values_list("pk", flat=True), ["alive"])
+
+    def test_unchanged_session_is_not_saved(self):
+        user = User.objects.create_superuser("session_admin", "session@example.com", "Pas$w0rd")
+        self.client.force_login(user)
+        url = reverse("myauth:session-set")
+
+        response = self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.3.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("sessionid", response.cookies)
+        session_key = response.cookies["sessionid"].value
+        self.assertEqual(self.client.session["foobar"], "spameggs")
+
+        response = self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.3.0.2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertEqual(self.client.session.session_key, session_key)
+
+
+class ProfilesTestCase(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches["templates"].clear()
+
+    def test_profile_is_created_with_user(self):
+        user = User.objects.create_user(username="new_user", password="Pas$w0rd")
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+
+    def test_profiles_list_runs_constant_queries(self):
+        url = reverse("myauth:profiles_list")
+        User.objects.create_user(username="user_0")
+        with self.assertNumQueries(2):
+            self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.4.0.1')
+
+        for number in range(1, 80):
+            User.objects.create_user(username=f"user_{number}")
+        # count, page
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.4.0.2')
+        self.assertContains(response, "user_49")
+        self.assertNotContains(response, "user_50")
+        # the page is cached until a profile or a user changes
+        with self.assertNumQueries(1):
+            self.client.get(url, HTTP_USER_AGENT='test-agent', REMOTE_ADDR='10.4.0.3')
+
+    def test_login_keeps_profiles_list_cached(self):
+        User.objects.create_user(username="login_user", password="Pas$w0rd")
+        version = profiles_version()
+        self.assertTrue(self.client.login(username="login_user", password="Pas$w0rd"))
+        self.assertEqual(profiles_version(), version)
+
+    def test_profiles_list_is_cached_per_language(self):
+        user = User.objects.create_user(username="user_0")
+        links = []
+        for number, language in enumerate(("en", "ru")):
+            # the request activates its language: override() restores the previous one
+            with translation.override(language):
+                links.append(reverse("myauth:profile_details", kwargs={"pk": user.profile.pk}))
+                response = self.client.get(
+                    reverse("myauth:profiles_list"), HTTP_USER_AGENT='test-agent', REMOTE_ADDR=f'10.4.1.{number}',
+                )
+            self.assertContains(response, links[-1])
+        self.assertNotEqual(*links)
+
+    def test_avatar_thumbnail_is_made_lazily(self):
+        buffer = BytesIO()
+        Image.new("RGB", (640, 480), "red").save(buffer, format="PNG")
+        user = User.objects.create_user(username="avatar_user", password="Pas$w0rd")
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            profile = user.profile
+            profile.avatar = SimpleUploadedFile("avatar.png", buffer.getvalue(), content_type="image/png")
+            profile.save()
+
+            url = profile.avatar_thumbnail_url
+
+            self.assertIn("/thumbs/128x128/", url)
+            thumbnail = profile.avatar.storage.path(url.removeprefix(profile.avatar.storage.base_url))
+            with Image.open(thumbnail) as image:
+                self.assertEqual(image.size, (128, 96))
+            self.assertEqual(profile.avatar_thumbnail_url, url)
+
+
+@override_settings(LOGIN_ATTEMPTS_PER_USER=2, LOGIN_ATTEMPTS_PER_IP=3)
+class LoginThrottlingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="login_user", password="Pas$w0rd")
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def login(self, username: str, password: str, address: str = "10.5.0.1", **extra) -> ThrottledAuthenticationForm:
+        request = RequestFactory().post("/", REMOTE_ADDR=address, **extra)
+        form = ThrottledAuthenticationForm(request, data={"username": username, "password": password})
+        form.is_valid()
+        return form
+
+    def test_user_is_throttled_before_password_check(self):
+        self.login("login_user", "wrong", "10.5.0.1")
+        self.login("login_user", "wrong", "10.5.0.2")
+
+        with self.assertNumQueries(0):
+            form = self.login("login_user", "Pas$w0rd", "10.5.0.3")
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+
+    def test_address_is_throttled(self):
+        for username in "first", "second", "third":
+            self.login(username, "wrong")
+        form = self.login("login_user", "Pas$w0rd")
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+
+    def test_successful_logins_do_not_use_up_address_limit(self):
+        for _ in range(5):
+            self.assertTrue(self.login("login_user", "Pas$w0rd").is_valid())
+        for username in "first", "second", "third":
+            self.login(username, "wrong")
+        form = self.login("login_user", "Pas$w0rd")
+        self.assertTrue(form.has_error("__all__", "too_many_attempts"))
+
+    @override_settings(LOGIN_CLIENT_ADDRESS_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_address_is_taken_from_proxy_header(self):
+        for username in "first", "second", "third":
+            self.login(username, "wrong", "10.0.0.1", HTTP_X_FORWARDED_FOR="1.1.1.1, 10.5.1.1")
+        form = self.login("login_user", "Pas$w0rd", "10.0.0.1", HTTP_X_FORWARDED_FOR="10.5.1.2")
+        self.assertTrue(form.is_valid())
+
+    def test_successful_login_resets_user_attempts(self):
+        self.login("login_user", "wrong", "10.5.0.1")
+        self.assertTrue(self.login("login_user", "Pas$w0rd", "10.5.0.2").is_valid())
+        self.login("login_user", "wrong", "10.5.0.3")
+        self.assertTrue(self.login("login_user", "Pas$w0rd", "10.5.0.4").is_valid())
+
+
+class PasswordHasherTestCase(TestCase):
+    def test_password_is_rehashed_with_new_cost(self):
+        with override_settings(
+            PASSWORD_HASHERS=["myauth.hashers.PBKDF2PasswordHasher"],
+            PASSWORD_HASHER="pbkdf2_sha256",
+            PASSWORD_HASHER_PARAMS="iterations=1000",
+        ):
+            user = User.objects.create_user(username="hashed_user", password="Pas$w0rd")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+        with override_settings(
+            PASSWORD_HASHERS=["myauth.hashers.PBKDF2PasswordHasher"],
+            PASSWORD_HASHER="pbkdf2_sha256",
+            PASSWORD_HASHER_PARAMS="iterations=2000",
+        ):
+            self.assertTrue(user.check_password("Pas$w0rd"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_password_is_rehashed_with_new_algorithm(self):
+        user = User.objects.create_user(username="scrypt_user")
+        user.password = make_password("Pas$w0rd", hasher="pbkdf2_sha256")
+        user.save()
+
+        with override_settings(
+            PASSWORD_HASHERS=["myauth.hashers.ScryptPasswordHasher", "myauth.hashers.PBKDF2PasswordHasher"],
+            PASSWORD_HASHER="scrypt",
+            PASSWORD_HASHER_PARAMS="work_factor=1024",
+        ):
+            self.assertTrue(user.check_password("Pas$w0rd"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$"))
@@ -0,0 +1,71 @@
+"""
+Login attempts limits per username and per client address.
+
+Attempts are counted before the password is checked, so a burst of
+logins is rejected without spending CPU on password hashing. A successful
+login takes its attempt back from the address, so many users behind one
+address (an office, a proxy) only share the limit of failed logins.
+
+Behind a reverse proxy every request comes from the proxy's address:
+`LOGIN_CLIENT_ADDRESS_HEADER` names the META key the proxy sets to the
+client address (e.g. HTTP_X_FORWARDED_FOR; the last entry is used, the
+one added by the proxy).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+
+
+def client_address(request: HttpRequest) -> str:
+    header = settings.LOGIN_CLIENT_ADDRESS_HEADER
+    if header and request.META.get(header):
+        return request.META[header].split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def login_attempts_keys(request: HttpRequest, username: str):
+    username_hash = hashlib.sha256(username.lower().encode()).hexdigest()
+    return [
+        (f"login-attempts:user:{username_hash}", settings.LOGIN_ATTEMPTS_PER_USER),
+        (f"login-attempts:ip:{client_address(request)}", settings.LOGIN_ATTEMPTS_PER_IP),
+    ]
+
+
+def count_attempt(key: str) -> int:
+    cache.add(key, 0, settings.LOGIN_ATTEMPTS_WINDOW)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # expired between add() and incr()
+        cache.set(key, 1, settings.LOGIN_ATTEMPTS_WINDOW)
+        return 1
+
+
+def login_attempt_allowed(request: HttpRequest, username: str) -> bool:
+    """
+    Counts the login attempt, False if the username or the client address
+    made more than the allowed number of attempts in the window.
+    """
+    counts = [
+        count_attempt(key) <= limit
+        for key, limit in login_attempts_keys(request, username)
+    ]
+    return all(counts)
+
+
+def reset_login_attempts(request: HttpRequest, username: str) -> None:
+    """
+    Forgets the attempts of the username after a successful login and
+    takes the attempt back from the client address. The other attempts of
+    the address stay: logging in to one account must not reset the limit
+    for guessing the passwords of others.
+    """
+    (user_key, _), (address_key, _) = login_attempts_keys(request, username)
+    cache.delete(user_key)
+    try:
+        cache.decr(address_key)
+    except ValueError:
+        # expired in the meantime
+        pass
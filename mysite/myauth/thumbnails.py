@@ -0,0 +1,43 @@
+"""
+Thumbnails of uploaded images, made lazily on the first request.
+
+A thumbnail is stored next to the image under `thumbs/<width>x<height>/`,
+so after the first render it costs a storage lookup and no queries.
+Its name follows from the image name, so it is saved under that name
+in the default storage, not by content as the images themselves.
+"""
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Tuple
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from PIL import Image
+
+THUMBNAIL_SIZE = (128, 128)
+
+
+def thumbnail_name(name: str, size: Tuple[int, int]) -> str:
+    path = PurePosixPath(name)
+    return str(path.parent / "thumbs" / f"{size[0]}x{size[1]}" / path.name)
+
+
+def get_thumbnail_url(image: FieldFile, size: Tuple[int, int] = THUMBNAIL_SIZE) -> str:
+    """
+    URL of the thumbnail of the image, the thumbnail is made if missing.
+    Falls back to the image itself if it cannot be read.
+    """
+    storage = default_storage
+    name = thumbnail_name(image.name, size)
+    if not storage.exists(name):
+        buffer = BytesIO()
+        try:
+            with image.open("rb"), Image.open(image) as source:
+                image_format = source.format
+                source.thumbnail(size)
+                source.save(buffer, format=image_format)
+        except (OSError, ValueError):
+            return image.url
+        name = storage.save(name, ContentFile(buffer.getvalue()))
+    return storage.url(name)
@@ -1,6 +1,7 @@
 from django.urls import path
 from django.contrib.auth.views import LoginView
 
+from .forms import ThrottledAuthenticationForm
 from .views import (
     get_cookie_view,
     set_cookie_view,
@@ -24,6 +25,7 @@ urlpatterns = [
         "login/",
         LoginView.as_view(
             template_name="myauth/login.html",
+            authentication_form=ThrottledAuthenticationForm,
             redirect_authenticated_user=True,
         ),
         name="login"
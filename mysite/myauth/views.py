@@ -3,7 +3,6 @@ from random import random
 
 from django.contrib.auth.decorators import login_required, permission_required, user_passes_test
 from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.auth.views import LogoutView
 from django.shortcuts import render, redirect, reverse
 from django.http import HttpResponse, HttpRequest, JsonResponse
@@ -14,8 +13,13 @@ from django.views.generic import TemplateView, CreateView, ListView, DetailView,
 from django.utils.translation import gettext_lazy as _, ngettext
 from django.views.decorators.cache import cache_page
 
+from mysite.conditional import ConditionalGetMixin
+
 from .forms import ProfileUpdateForm
+from .mixins import ObjectPermissionMixin
 from .models import Profile
+from .profiles import profiles_version
+from .throttling import login_attempt_allowed, reset_login_attempts
 
 logger = logging.getLogger(__name__)
 
@@ -40,27 +44,43 @@ class AboutMeView(TemplateView):
 
 
 
-class ProfilesListView(ListView):
+class ProfilesListView(ConditionalGetMixin, ListView):
     template_name = "myauth/profiles-list.html"
     context_object_name = "profiles"
-    model = Profile
+    paginate_by = 50
+    queryset = (
+        Profile.objects
+        .select_related("user")
+        .only("bio", "avatar", "user__username")
+        .order_by("pk")
+    )
+
+    def get_version_token(self):
+        return str(profiles_version())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["profiles_version"] = profiles_version()
+        return context
 
 
-class ProfileDetailView(DetailView):
+class ProfileDetailView(ConditionalGetMixin, DetailView):
     template_name = "myauth/profile-details.html"
-    model = Profile
+    queryset = Profile.objects.select_related("user").only("bio", "avatar", "user__username")
     context_object_name = "profile"
 
+    def get_version_token(self):
+        return f"{self.kwargs['pk']}:{profiles_version()}"
+
 
-class ProfileUpdateView(UserPassesTestMixin, UpdateView):
+class ProfileUpdateView(ObjectPermissionMixin, UpdateView):
     model = Profile
     template_name_suffix = '_update_form'
     form_class = ProfileUpdateForm
 
-    def test_func(self):
+    def has_object_permission(self, profile: Profile) -> bool:
         user = self.request.user
-        profile = self.get_object()
-        return user.is_staff or user.profile.user_id == profile.user_id
+        return user.is_staff or profile.user_id == user.pk
 
     def get_success_url(self):
         return reverse_lazy('myauth:profile_details', kwargs={'pk': self.object.pk})
@@ -75,8 +95,8 @@ class RegisterView(CreateView):
     success_url = reverse_lazy("myauth:about-me")
 
     def form_valid(self, form):
+        # the profile is created by the post_save receiver of User
         response = super().form_valid(form)
-        Profile.objects.create(user=self.object)
         username = form.cleaned_data.get("username")
         password = form.cleaned_data.get("password1")
 
@@ -99,8 +119,12 @@ def login_view(request: HttpRequest) -> HttpResponse:
     username = request.POST["username"]
     password = request.POST["password"]
 
+    if not login_attempt_allowed(request, username):
+        return render(request, "myauth/login.html", {"error": "Too many login attempts"})
+
     user = authenticate(request, username=username, password=password)
     if user is not None:
+        reset_login_attempts(request, username)
         login(request, user)
         logger.info("User logged in: %s", user.username)
         return redirect("/admin/")
@@ -129,7 +153,9 @@ def get_cookie_view(request: HttpRequest) -> HttpResponse:
 
 @permission_required("myauth:view_profile", raise_exception=True)
 def set_session_view(request: HttpRequest) -> HttpResponse:
-    request.session["foobar"] = "spameggs"
+    # setting an unchanged value would still mark the session as modified
+    if request.session.get("foobar") != "spameggs":
+        request.session["foobar"] = "spameggs"
     logger.info("Session set for user: %s", request.user.username)
     return HttpResponse("Session set")
 
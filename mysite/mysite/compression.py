@@ -0,0 +1,95 @@
+"""
+Response compression.
+
+Text responses (HTML, JSON, CSS, JS, XML) above `COMPRESSION_MIN_SIZE`
+bytes are compressed with brotli when the client accepts it and the
+optional `brotli` package is installed, with gzip otherwise. Small
+responses are sent as is: the compressed body would hardly be smaller.
+Streaming responses are left alone, static files are compressed
+beforehand by `collectstatic`.
+
+Responses that may carry secrets (a rendered CSRF token, pages of a
+signed-in user) are always gzipped: GZipMiddleware pads them with random
+bytes against BREACH, which brotli has no place for.
+"""
+import gzip
+import re
+from typing import Optional
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+BROTLI_RE = re.compile(r"\bbr\b")
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "text/xml",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in COMPRESSIBLE_CONTENT_TYPES
+
+
+def accepts_brotli(accept_encoding: str) -> bool:
+    return brotli is not None and bool(BROTLI_RE.search(accept_encoding))
+
+
+def may_contain_secrets(request) -> bool:
+    if request.META.get("CSRF_COOKIE_USED"):
+        return True
+    user = getattr(request, "user", None)
+    return user is not None and user.is_authenticated
+
+
+def compress_gzip(data: bytes) -> bytes:
+    # mtime=0: the same file always gives the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data: bytes, quality: int = 11) -> Optional[bytes]:
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=quality)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if not is_compressible(response.get("Content-Type", "")):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        if not accepts_brotli(request.META.get("HTTP_ACCEPT_ENCODING", "")) or may_contain_secrets(request):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # a fast level: the response is compressed on every request
+        compressed = compress_brotli(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = "br"
+        # the body differs from the uncompressed one, as in GZipMiddleware
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
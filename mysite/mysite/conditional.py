@@ -0,0 +1,68 @@
+"""
+Conditional GET for class-based views.
+"""
+import hashlib
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.db.models import Count, Max, QuerySet
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+
+class QuerySetVersion(NamedTuple):
+    count: int
+    latest: Optional[datetime]
+
+    def __str__(self) -> str:
+        return f"{self.count}:{self.latest.isoformat() if self.latest else ''}"
+
+
+def queryset_version(queryset: QuerySet, field: str = "updated_at") -> QuerySetVersion:
+    """
+    Number of objects and their latest change in one aggregate query.
+    The count catches deletions, which do not move the latest timestamp.
+    """
+    stats = queryset.order_by().aggregate(count=Count("pk"), latest=Max(field))
+    return QuerySetVersion(stats["count"], stats["latest"])
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET/HEAD with 304 when the client has the current version of
+    the page, before the view loads its objects or renders the template.
+
+    Views override `get_version_token` with a cheap string that changes
+    whenever the page changes; without it (None) the check is skipped and
+    the page is always rendered. The ETag also covers the language, the
+    query string and the user, as pages show user specific links.
+    """
+    def get_version_token(self) -> Optional[str]:
+        return None
+
+    def get_user_variant(self) -> str:
+        user = self.request.user
+        return f"user:{user.pk}" if user.is_authenticated else "anonymous"
+
+    def get_etag(self) -> Optional[str]:
+        token = self.get_version_token()
+        if token is None:
+            return None
+        parts = [
+            type(self).__name__,
+            token,
+            get_language() or "",
+            self.request.GET.urlencode(),
+            self.get_user_variant(),
+        ]
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+
+        @condition(etag_func=lambda request, *args, **kwargs: self.get_etag())
+        def conditional_dispatch(request, *args, **kwargs):
+            return super(ConditionalGetMixin, self).dispatch(request, *args, **kwargs)
+
+        return conditional_dispatch(request, *args, **kwargs)
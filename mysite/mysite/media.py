@@ -0,0 +1,182 @@
+"""
+Serving of uploaded media files.
+
+Every file under MEDIA_URL goes through `serve_media`, which first checks
+the access rule registered for the longest matching path prefix (see
+`register_media_access`, called from the apps' `ready()`); files without
+a rule are not served at all.
+
+The bytes are not copied through Python: with `MEDIA_OFFLOAD` the front
+server sends the file (`X-Accel-Redirect` for nginx, `X-Sendfile` for
+Apache/lighttpd), otherwise the open file is handed to the WSGI server's
+file wrapper, which uses sendfile(). Range requests, ETag and
+Last-Modified are supported either way.
+"""
+import mimetypes
+import os
+import re
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+MediaAccessCheck = Callable[[HttpRequest, str], bool]
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+X_ACCEL_REDIRECT = "x-accel-redirect"
+X_SENDFILE = "x-sendfile"
+
+_access_rules: Dict[str, Tuple[MediaAccessCheck, bool]] = {}
+
+
+def register_media_access(prefix: str, check: MediaAccessCheck, public: bool = False) -> None:
+    """
+    Files under `prefix` are served to requests for which `check(request, name)`
+    is true. Responses of public files may be stored by shared caches.
+    """
+    _access_rules[prefix] = (check, public)
+
+
+def allow_any(request: HttpRequest, name: str) -> bool:
+    return True
+
+
+def get_access_rule(name: str) -> Optional[Tuple[MediaAccessCheck, bool]]:
+    prefixes = [prefix for prefix in _access_rules if name.startswith(prefix)]
+    if not prefixes:
+        return None
+    return _access_rules[max(prefixes, key=len)]
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte of a single "bytes=" range, None if the header
+    cannot be used and the whole file is sent. Raises ValueError if the
+    range is not satisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Empty range")
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last != "" and int(last) < first:
+        return None
+    if first >= size:
+        raise ValueError("Range starts after the end of the file")
+    last = size - 1 if last == "" else min(int(last), size - 1)
+    return first, last
+
+
+class RangeFile:
+    """
+    Part of an open file, as a file-like object for FileResponse.
+
+    `fileno()` and the file position are those of the file, so a WSGI file
+    wrapper with sendfile() sends just the range (Content-Length is set to
+    its size); other servers read it in blocks.
+    """
+    def __init__(self, file, first: int, last: int):
+        self.file = file
+        self.file.seek(first)
+        self.remaining = last - first + 1
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def media_content_type(path: str) -> str:
+    content_type, encoding = mimetypes.guess_type(path)
+    # compressed files are sent as they are, not as their content
+    if encoding or not content_type:
+        return "application/octet-stream"
+    return content_type
+
+
+def offload_response(name: str, full_path: str) -> HttpResponse:
+    response = HttpResponse()
+    if settings.MEDIA_OFFLOAD == X_ACCEL_REDIRECT:
+        response.headers["X-Accel-Redirect"] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+    else:
+        response.headers["X-Sendfile"] = full_path
+    return response
+
+
+def file_response(request: HttpRequest, full_path: str, size: int, etag: str, last_modified: float) -> HttpResponse:
+    file = open(full_path, "rb")
+    byte_range = None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if "HTTP_RANGE" in request.META and (
+        if_range is None or if_range == etag or parse_http_date_safe(if_range) == int(last_modified)
+    ):
+        try:
+            byte_range = parse_range(request.META["HTTP_RANGE"], size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None:
+        return FileResponse(file)
+
+    first, last = byte_range
+    response = FileResponse(RangeFile(file, first, last), status=206)
+    response.headers["Content-Length"] = str(last - first + 1)
+    response.headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    return response
+
+
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    rule = get_access_rule(path)
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found")
+    # files the user may not see look the same as missing ones
+    if rule is None or not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+    check, public = rule
+    if not check(request, path):
+        raise Http404("Media file not found")
+
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        if settings.MEDIA_OFFLOAD:
+            response = offload_response(path, full_path)
+        else:
+            response = file_response(request, full_path, stat.st_size, etag, stat.st_mtime)
+        if response.status_code != 416:
+            response.headers["Content-Type"] = media_content_type(full_path)
+        response.headers["Accept-Ranges"] = "bytes"
+
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = http_date(stat.st_mtime)
+    if public:
+        response.headers["Cache-Control"] = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    else:
+        # revalidated on every use: access may be revoked
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
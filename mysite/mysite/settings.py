@@ -18,13 +18,27 @@ from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 import sentry_sdk
 
-sentry_sdk.init(
-    dsn="https://e8274c19ccac4f3d8c9bf38f1ab28166@o4505376656130048.ingest.sentry.io/4505376672382976",
-    traces_sample_rate=1.0,
-)
+from .logs import enqueue_root_handlers, parse_levels
+from .tracing import FileTransport, make_traces_sampler, slow_routes
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
+
+# "or": docker-compose passes keys left empty in .env as ""
+SENTRY_TRACES_SAMPLE_RATE = float(getenv("SENTRY_TRACES_SAMPLE_RATE") or "0.05")
+SENTRY_SLOW_REQUEST_MS = float(getenv("SENTRY_SLOW_REQUEST_MS") or "1000")
+# Path to a file: envelopes are written there instead of being sent to Sentry
+SENTRY_OFFLINE_FILE = getenv("SENTRY_OFFLINE_FILE", "")
+
+slow_routes.threshold_ms = SENTRY_SLOW_REQUEST_MS
+
+sentry_sdk.init(
+    dsn=getenv("SENTRY_DSN")
+    or "https://e8274c19ccac4f3d8c9bf38f1ab28166@o4505376656130048.ingest.sentry.io/4505376672382976",
+    environment=getenv("SENTRY_ENVIRONMENT") or "production",
+    traces_sampler=make_traces_sampler(SENTRY_TRACES_SAMPLE_RATE),
+    transport=FileTransport(SENTRY_OFFLINE_FILE) if SENTRY_OFFLINE_FILE else None,
+)
 DATABASE_DIR = BASE_DIR / "database"
 DATABASE_DIR.mkdir(exist_ok=True)
 
@@ -80,8 +94,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mysite.logs.RequestIdMiddleware',
+    'mysite.compression.CompressionMiddleware',
     # 'django.middleware.cache.UpdateCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'mysite.tracing.SlowRequestTracingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -132,10 +149,69 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
         'LOCATION': '/var/tmp/django_cache',
     },
+    # Sessions of the cache/cached_db session engines, shared by all workers.
+    # Past MAX_ENTRIES a write culls 1/CULL_FREQUENCY of the files at random,
+    # which logs users out with the "cache" engine: keep it above the number
+    # of live sessions. Every write lists the directory, so with many more
+    # sessions switch this alias to a shared redis or memcached backend.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/django_sessions',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    # Rendered template fragments, keys carry the version of the object
+    'templates': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'templates',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 CACHE_MIDDLEWARE_SECONDS = 200
 
+# cached_db reads sessions from the cache and writes through to the database,
+# "django.contrib.sessions.backends.cache" skips the database completely
+SESSION_ENGINE = getenv('DJANGO_SESSION_ENGINE') or 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+# unmodified sessions are not written back
+SESSION_SAVE_EVERY_REQUEST = False
+
+AUTHENTICATION_BACKENDS = [
+    'myauth.backends.CachedPermissionBackend',
+]
+
+# Algorithm of new password hashes: pbkdf2_sha256, scrypt or argon2
+# (needs argon2-cffi), its cost is tuned with "name=value,..." parameters
+# of the hasher, e.g. "work_factor=65536" for scrypt
+PASSWORD_HASHER = getenv('DJANGO_PASSWORD_HASHER') or 'pbkdf2_sha256'
+PASSWORD_HASHER_PARAMS = getenv('DJANGO_PASSWORD_HASHER_PARAMS', '')
+
+TUNED_PASSWORD_HASHERS = {
+    'pbkdf2_sha256': 'myauth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'myauth.hashers.ScryptPasswordHasher',
+    'argon2': 'myauth.hashers.Argon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [TUNED_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in TUNED_PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+LOGIN_ATTEMPTS_PER_USER = 5
+LOGIN_ATTEMPTS_PER_IP = 20
+LOGIN_ATTEMPTS_WINDOW = 5 * 60
+# META key with the client address set by the trusted reverse proxy,
+# e.g. HTTP_X_FORWARDED_FOR; REMOTE_ADDR is used when it is empty
+LOGIN_CLIENT_ADDRESS_HEADER = getenv('DJANGO_CLIENT_ADDRESS_HEADER', '')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -182,9 +258,42 @@ LANGUAGES = [
 
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Cache lifetime of static files without a hash in the name,
+# hashed ones are cached for a year
+STATIC_MAX_AGE = int(getenv('DJANGO_STATIC_MAX_AGE') or 60 * 60)
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # hashed names and precompressed variants, written by collectstatic
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG else
+            'mysite.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# Responses smaller than this are not compressed
+COMPRESSION_MIN_SIZE = int(getenv('DJANGO_COMPRESSION_MIN_SIZE') or 1024)
+# Brotli quality of responses compressed on the fly, 0-11
+COMPRESSION_BROTLI_QUALITY = 5
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'uploads'
+# Media files are sent by the front server after the access check:
+# "x-accel-redirect" (nginx, an internal location at MEDIA_ACCEL_REDIRECT_PREFIX
+# with MEDIA_ROOT as its alias) or "x-sendfile" (Apache, lighttpd).
+# Empty: the app sends them itself
+MEDIA_OFFLOAD = getenv('DJANGO_MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Cache lifetime of public media (product images, avatars)
+MEDIA_MAX_AGE = int(getenv('DJANGO_MEDIA_MAX_AGE') or 24 * 60 * 60)
+
+# Files of large admin CSV exports, served only through the admin
+ADMIN_EXPORTS_DIR = BASE_DIR / 'exports'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -209,62 +318,48 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
-# LOGFILE_NAME = BASE_DIR / "log.txt"
-# #LOGFILE_SIZE = 400
-# LOGFILE_SIZE = 1 * 1024 * 1024
-# LOGFILE_COUNT = 3
-LOGLEVEL = getenv("DJANGO_LOGLEVEL", "info").upper()
+LOGLEVEL = (getenv("DJANGO_LOGLEVEL") or "info").upper()
+# Per-logger levels, e.g. "shopapp=debug,django.db.backends=warning"
+LOGLEVELS = parse_levels(getenv("DJANGO_LOGLEVELS", ""))
+# Rotating log file, disabled when empty
+LOGFILE_NAME = getenv("DJANGO_LOGFILE", "")
+LOGFILE_SIZE = int(getenv("DJANGO_LOGFILE_SIZE") or 10 * 1024 * 1024)
+LOGFILE_COUNT = int(getenv("DJANGO_LOGFILE_COUNT") or 3)
+
+LOGGING_HANDLERS = {
+    'console': {
+        'class': 'logging.StreamHandler',
+        'formatter': 'json',
+    },
+}
+if LOGFILE_NAME:
+    LOGGING_HANDLERS['logfile'] = {
+        'class': 'logging.handlers.RotatingFileHandler',
+        'filename': LOGFILE_NAME,
+        'maxBytes': LOGFILE_SIZE,
+        'backupCount': LOGFILE_COUNT,
+        'formatter': 'json',
+    }
 
 logging.config.dictConfig({
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'console': {
-            'format': '%(asctime)s %(levelname)s [%(name)s:%(lineno)s] %(module)s %(message)s',
-        },
-    },
-    'handlers': {
-         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'console',
+        'json': {
+            '()': 'mysite.logs.JsonFormatter',
         },
     },
+    'handlers': LOGGING_HANDLERS,
     'loggers': {
         '': {
             'level': LOGLEVEL,
-            'handlers': [
-                'console',
-            ],
+            'handlers': list(LOGGING_HANDLERS),
+        },
+        **{
+            name: {'level': level}
+            for name, level in LOGLEVELS.items()
         },
     },
 })
-
-# LOGGING = {
-#     'version': 1,
-#     'disable_existing_loggers': False,
-#     'formatters': {
-#         'verbose': {
-#             'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-#         },
-#     },
-#     'handlers': {
-#         'console': {
-#             'class': 'logging.StreamHandler',
-#             'formatter': 'verbose',
-#         },
-#         'logfile': {
-#             'class': 'logging.handlers.RotatingFileHandler',
-#             'filename': LOGFILE_NAME,
-#             'maxBytes': LOGFILE_SIZE,
-#             'backupCount': LOGFILE_COUNT,
-#             'formatter': 'verbose',
-#         },
-#     },
-#     'root': {
-#         'handlers': [
-#             'console',
-#             'logfile',
-#         ],
-#         'level': 'INFO',
-#     },
-# }
\ No newline at end of file
+# Log I/O happens in a background thread, request threads only enqueue records
+enqueue_root_handlers()
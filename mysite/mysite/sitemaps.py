@@ -1,3 +1,19 @@
+"""
+Sitemap sections and cached sitemap views.
+
+Rendered sections are cached under a per-section version that is bumped
+when the models of the section change, and the views answer
+`If-Modified-Since` with 304 using the cached latest `lastmod`.
+"""
+import time
+from functools import wraps
+
+from django.contrib.sitemaps import views
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
 from blogapp.sitemap import BlogSitemap
 from shopapp.sitemap import ShopSitemap
 
@@ -5,4 +21,82 @@ from shopapp.sitemap import ShopSitemap
 sitemaps = {
     "blog": BlogSitemap,
     "shopapp": ShopSitemap,
-}
\ No newline at end of file
+}
+
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def section_version(section: str) -> int:
+    return cache.get_or_set(f"sitemap:version:{section}", time.time_ns, None)
+
+
+def invalidate_section(section: str) -> None:
+    cache.set(f"sitemap:version:{section}", time.time_ns(), None)
+
+
+def section_invalidator(section: str):
+    """
+    Returns a signal receiver that invalidates the given sitemap section.
+    """
+    def receiver(**kwargs):
+        invalidate_section(section)
+    return receiver
+
+
+def _versions_key(section=None) -> str:
+    sections = [section] if section else sorted(sitemaps)
+    return ":".join(f"{name}.{section_version(name)}" for name in sections)
+
+
+def sitemap_last_modified(request, sitemaps, section=None, **kwargs):
+    key = f"sitemap:lastmod:{_versions_key(section)}"
+    lastmod = cache.get(key)
+    if lastmod is None:
+        names = [section] if section else list(sitemaps)
+        lastmods = [
+            sitemaps[name]().get_latest_lastmod()
+            for name in names
+            if name in sitemaps
+        ]
+        lastmod = max((value for value in lastmods if value), default=0)
+        cache.set(key, lastmod, SITEMAP_CACHE_TIMEOUT)
+    return lastmod or None
+
+
+def cached_sitemap_view(view):
+    """
+    Caches the rendered page per section, language and page number.
+    Other query parameters (tracking tags, junk from crawlers) do not
+    change the page, so they get no cache entries of their own.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        page = request.GET.get("p", "1")
+        if not page.isdigit():
+            # the view answers 404
+            return view(request, *args, **kwargs)
+        key = "sitemap:page:{versions}:{lang}:{section}:{page}".format(
+            versions=_versions_key(kwargs.get("section")),
+            lang=get_language(),
+            section=kwargs.get("section") or "index",
+            page=int(page),
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            cached = response.content, dict(response.items())
+            cache.set(key, cached, SITEMAP_CACHE_TIMEOUT)
+        content, headers = cached
+        return HttpResponse(content, headers=headers)
+    return wrapper
+
+
+index = condition(last_modified_func=sitemap_last_modified)(
+    cached_sitemap_view(views.index)
+)
+sitemap = condition(last_modified_func=sitemap_last_modified)(
+    cached_sitemap_view(views.sitemap)
+)
@@ -0,0 +1,119 @@
+"""
+Static files in production.
+
+`collectstatic` stores every file under a content-hashed name (from the
+manifest of ManifestStaticFilesStorage) and writes precompressed `.gz`
+and, with the optional `brotli` package, `.br` variants next to the
+compressible ones. `serve_static` sends them from the app container:
+the smallest variant the client accepts, hashed names with far-future
+cache headers, everything else with a short max-age and revalidation.
+"""
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepts_brotli, compress_brotli, compress_gzip, is_compressible
+
+# name.0123456789ab.css, as made by HashedFilesMixin
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+GZIP_RE = re.compile(r"\bgzip\b")
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes compressed variants
+    of the collected files.
+
+    Without a manifest (collectstatic has not been run, e.g. in tests)
+    the original names are used instead of failing on every `{% static %}`.
+    """
+    compression_min_size = 256
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.add(name)
+                if hashed_name:
+                    names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            self.compress(name)
+
+    def compress(self, name: str) -> bool:
+        """
+        Writes `name.gz` and `name.br` if they are smaller than the file.
+        """
+        content_type = mimetypes.guess_type(name)[0] or ""
+        if not is_compressible(content_type) or not self.exists(name):
+            return False
+        path = Path(self.path(name))
+        data = path.read_bytes()
+        if len(data) < self.compression_min_size:
+            return False
+        written = False
+        for suffix, compress in (".gz", compress_gzip), (".br", compress_brotli):
+            compressed = compress(data)
+            if compressed is not None and len(compressed) < len(data):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                written = True
+        return written
+
+
+def select_variant(path: str, accept_encoding: str):
+    """
+    The precompressed variant of the file the client accepts:
+    (path, content encoding), the file itself if there is none.
+    """
+    if accepts_brotli(accept_encoding) and os.path.isfile(path + ".br"):
+        return path + ".br", "br"
+    if GZIP_RE.search(accept_encoding) and os.path.isfile(path + ".gz"):
+        return path + ".gz", "gzip"
+    return path, None
+
+
+def serve_static(request: HttpRequest, path: str, document_root: str = None):
+    document_root = document_root or settings.STATIC_ROOT
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404("Static file not found")
+    if not os.path.isfile(full_path) or full_path.endswith((".gz", ".br")):
+        raise Http404("Static file not found")
+
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        file_path, encoding = select_variant(full_path, request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        response = FileResponse(open(file_path, "rb"), content_type=content_type)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Last-Modified"] = http_date(stat.st_mtime)
+
+    if HASHED_NAME_RE.search(path):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={settings.STATIC_MAX_AGE}, must-revalidate"
+    if is_compressible(mimetypes.guess_type(full_path)[0] or ""):
+        patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -0,0 +1,215 @@
+"""
+Content-addressed storage of uploaded files.
+
+A file is stored under the SHA-256 of its content, in the directory given
+by `upload_to` and two levels of shard directories:
+
+    products/images/3f/a2/3fa2…c9.png
+
+The hash is computed while the upload is written to a temporary file,
+which is then renamed into place; an identical file that is already
+stored is reused, so the same image uploaded for many products takes
+the space once. Files of different `upload_to` directories are never
+shared, which keeps the access rules of `mysite.media` per directory.
+
+Files are not owned by a single object, so they are not deleted with it.
+`release_files` (connected to post_delete) deletes the files of a deleted
+object that no other object references: references are counted in the
+database over all fields with this storage, so the count cannot drift.
+Files orphaned otherwise (replaced uploads, rolled back transactions) are
+removed by the `cleanup_media` command.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List, Set
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import FileField, Model
+
+INCOMING_DIR = ".incoming"
+# files younger than this may have just been reused by an upload
+# whose object is not committed yet, they are never deleted
+RELEASE_GRACE_SECONDS = 60 * 60
+
+CONTENT_NAME_RE = re.compile(
+    r"^(?P<source>(?:.+/)?(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/)"
+    r"(?:thumbs/\d+x\d+/)?"
+    r"(?P<digest>[0-9a-f]{64})(?P<ext>\.\w+)?$"
+)
+# extensions of uploaded names that are kept; others are dropped
+EXTENSION_RE = re.compile(r"\.[a-z0-9]{1,10}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    chunk_size = 64 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # the final name is only known when the content is read in _save()
+        return name
+
+    def content_name(self, name: str, digest: str) -> str:
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        if not EXTENSION_RE.fullmatch(extension):
+            extension = ""
+        return posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+
+    def _save(self, name, content):
+        incoming = self.path(INCOMING_DIR)
+        os.makedirs(incoming, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=incoming)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in content.chunks(self.chunk_size):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            name = self.content_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                # keeps the file away from release_files() for the grace period
+                os.utime(full_path)
+                return name
+
+            directory = os.path.dirname(full_path)
+            if self.directory_permissions_mode is not None:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            else:
+                os.makedirs(directory, exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary_path, self.file_permissions_mode)
+            # atomic: concurrent uploads of the same content end with one file
+            os.replace(temporary_path, full_path)
+            return name
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def delete_unreferenced(self, name: str, grace: int = RELEASE_GRACE_SECONDS) -> bool:
+        """
+        Deletes the file if no object references it and it was not
+        stored or reused in the last `grace` seconds.
+        """
+        if not CONTENT_NAME_RE.match(name) or count_references(name) or not self.exists(name):
+            return False
+        if time.time() - os.path.getmtime(self.path(name)) < grace:
+            return False
+        self.delete(name)
+        return True
+
+
+content_storage = ContentAddressedStorage()
+
+
+def get_content_storage() -> ContentAddressedStorage:
+    return content_storage
+
+
+def content_fields(model: type[Model] = None) -> List[FileField]:
+    """
+    File fields stored in the content-addressed storage,
+    of the model or of all models.
+    """
+    models = [model] if model is not None else apps.get_models()
+    return [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def count_references(name: str) -> int:
+    return sum(
+        field.model._default_manager.filter(**{field.name: name}).count()
+        for field in content_fields()
+    )
+
+
+def referenced_names() -> Set[str]:
+    names = set()
+    for field in content_fields():
+        queryset = field.model._default_manager.exclude(**{field.name: ""}).exclude(**{f"{field.name}__isnull": True})
+        names.update(queryset.values_list(field.name, flat=True).iterator(chunk_size=2000))
+    return names
+
+
+def release_files(sender, instance: Model, **kwargs) -> None:
+    """
+    post_delete receiver: deletes the files of the object that are no longer
+    referenced, once the deletion is committed.
+    """
+    names = [
+        (field.storage, getattr(instance, field.attname).name)
+        for field in content_fields(sender)
+        if getattr(instance, field.attname)
+    ]
+    if not names:
+        return
+
+    def delete():
+        for storage, name in names:
+            storage.delete_unreferenced(name)
+
+    transaction.on_commit(delete)
+
+
+def stored_files(storage: ContentAddressedStorage) -> Iterator[str]:
+    """
+    Names of the content-addressed files and their thumbnails in the storage.
+    """
+    root = storage.path("")
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [dirname for dirname in dirnames if dirname != INCOMING_DIR]
+        for filename in filenames:
+            name = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, "/")
+            if CONTENT_NAME_RE.match(name):
+                yield name
+
+
+def source_name(name: str) -> str:
+    """
+    Name of the file a thumbnail is made of, the name itself for other files.
+    """
+    match = CONTENT_NAME_RE.match(name)
+    return f"{match['source']}{match['digest']}{match['ext'] or ''}"
+
+
+def collect_garbage(
+    storage: ContentAddressedStorage = content_storage,
+    grace: int = RELEASE_GRACE_SECONDS,
+    dry_run: bool = False,
+) -> List[str]:
+    """
+    Deletes the stored files and thumbnails no object references and the
+    leftovers of interrupted uploads, older than `grace` seconds.
+    Returns the deleted names.
+    """
+    referenced = referenced_names()
+    deadline = time.time() - grace
+    deleted = []
+    for name in stored_files(storage):
+        if source_name(name) in referenced or os.path.getmtime(storage.path(name)) > deadline:
+            continue
+        if not dry_run:
+            storage.delete(name)
+        deleted.append(name)
+
+    incoming = Path(storage.path(INCOMING_DIR))
+    if incoming.is_dir():
+        for path in incoming.iterdir():
+            if path.stat().st_mtime <= deadline:
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+                deleted.append(f"{INCOMING_DIR}/{path.name}")
+    return deleted
@@ -0,0 +1,187 @@
+import gzip
+import json
+import logging
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from unittest.mock import patch
+
+import sentry_sdk
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .compression import CompressionMiddleware
+from .logs import JsonFormatter, RequestIdFilter, RequestIdMiddleware, parse_levels
+from .staticfiles import IMMUTABLE_CACHE_CONTROL, CompressedManifestStaticFilesStorage, serve_static
+from .tracing import FileTransport, SlowRoutes, make_traces_sampler
+
+
+def sampling_context(path: str, method: str = "GET") -> dict:
+    return {
+        "parent_sampled": None,
+        "wsgi_environ": {"PATH_INFO": path, "REQUEST_METHOD": method},
+    }
+
+
+class TracesSamplerTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.sampler = make_traces_sampler(0.2)
+
+    def test_static_routes_are_not_traced(self):
+        self.assertEqual(self.sampler(sampling_context("/static/admin/base.css")), 0.0)
+        self.assertEqual(self.sampler(sampling_context("/en/media/products/1.png")), 0.0)
+
+    def test_order_writes_are_always_traced(self):
+        self.assertEqual(self.sampler(sampling_context("/en/shop/orders/create/", "POST")), 1.0)
+        self.assertEqual(self.sampler(sampling_context("/en/shop/api/orders/1/", "PATCH")), 1.0)
+
+    def test_default_rate(self):
+        self.assertEqual(self.sampler(sampling_context("/en/shop/products/")), 0.2)
+
+    def test_parent_decision_is_kept(self):
+        context = sampling_context("/static/app.js")
+        context["parent_sampled"] = True
+        self.assertEqual(self.sampler(context), 1.0)
+
+    def test_slow_routes_are_always_traced(self):
+        path = "/en/shop/products/1"
+        routes = SlowRoutes(threshold_ms=10)
+        routes.observe(path, 20)
+        with patch("mysite.tracing.slow_routes", routes):
+            self.assertEqual(self.sampler(sampling_context(path)), 1.0)
+
+    def test_slow_route_expires(self):
+        routes = SlowRoutes(threshold_ms=10, ttl=-1)
+        routes.observe("/a/", 20)
+        self.assertFalse(routes.is_slow("/a/"))
+
+    def test_slow_routes_are_bounded(self):
+        routes = SlowRoutes(threshold_ms=10, max_size=3)
+        for number in range(5):
+            routes.observe(f"/shop/products/{number}/", 20)
+        slow = [number for number in range(5) if routes.is_slow(f"/shop/products/{number}/")]
+        self.assertEqual(slow, [2, 3, 4])
+
+
+class FileTransportTestCase(SimpleTestCase):
+    def test_envelopes_are_written_to_file(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "envelopes.log"
+            client = sentry_sdk.Client(
+                dsn="https://key@sentry.invalid/1",
+                transport=FileTransport(path),
+            )
+            hub = sentry_sdk.Hub(client)
+            hub.capture_message("offline message")
+            client.flush()
+            self.assertIn(b"offline message", path.read_bytes())
+
+
+class StructuredLoggingTestCase(SimpleTestCase):
+    def test_parse_levels(self):
+        self.assertEqual(
+            parse_levels("shopapp=debug, django.db.backends=warning,broken"),
+            {"shopapp": "DEBUG", "django.db.backends": "WARNING"},
+        )
+
+    def test_request_id_is_added_to_records(self):
+        records = []
+
+        def view(request):
+            record = logging.LogRecord("shopapp", logging.INFO, __file__, 1, "hello %s", ("bob",), None)
+            RequestIdFilter().filter(record)
+            records.append(record)
+            return HttpResponse()
+
+        request = RequestFactory().get("/", HTTP_X_REQUEST_ID="abc123")
+        response = RequestIdMiddleware(view)(request)
+
+        self.assertEqual(response["X-Request-ID"], "abc123")
+        data = json.loads(JsonFormatter().format(records[0]))
+        self.assertEqual(data["request_id"], "abc123")
+        self.assertEqual(data["message"], "hello bob")
+        self.assertEqual(data["logger"], "shopapp")
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    def get_response(self, content: bytes, content_type: str = "text/html; charset=utf-8", **extra) -> HttpResponse:
+        middleware = CompressionMiddleware(lambda request: HttpResponse(content, content_type=content_type))
+        request = RequestFactory().get("/", **{"HTTP_ACCEPT_ENCODING": "gzip", **extra})
+        return middleware(request)
+
+    def test_large_html_is_compressed(self):
+        content = b"<p>product</p>" * 200
+        response = self.get_response(content)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), content)
+
+    def test_response_with_csrf_token_is_gzipped_with_padding(self):
+        content = b"<p>product</p>" * 200
+        with patch("mysite.compression.accepts_brotli", return_value=True):
+            responses = [
+                self.get_response(content, CSRF_COOKIE_USED=True, HTTP_ACCEPT_ENCODING="br, gzip")
+                for _ in range(5)
+            ]
+        self.assertEqual(responses[0]["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(responses[0].content), content)
+        # the random padding changes the length of the body
+        self.assertGreater(len({len(response.content) for response in responses}), 1)
+
+    def test_small_response_is_not_compressed(self):
+        response = self.get_response(b'{"id": 1}' * 10, "application/json")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_binary_response_is_not_compressed(self):
+        response = self.get_response(b"\x89PNG" * 1000, "image/png")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class StaticFilesTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.storage = CompressedManifestStaticFilesStorage(location=self.root, base_url="/static/")
+        self.css = "body { color: black; }\n" * 100
+        (self.root / "css").mkdir()
+        (self.root / "css" / "site.css").write_text(self.css)
+        (self.root / "icon.txt").write_text("small")
+        list(self.storage.post_process({
+            "css/site.css": (self.storage, "css/site.css"),
+            "icon.txt": (self.storage, "icon.txt"),
+        }))
+        self.storage.save_manifest()
+        self.hashed_name = self.storage.hashed_files["css/site.css"]
+
+    def get(self, path: str, **headers) -> HttpResponse:
+        request = RequestFactory().get(f"/static/{path}", **headers)
+        return serve_static(request, path, document_root=self.root)
+
+    def test_collected_files_are_hashed_and_compressed(self):
+        self.assertRegex(self.hashed_name, r"^css/site\.[0-9a-f]{12}\.css$")
+        compressed = self.root / f"{self.hashed_name}.gz"
+        self.assertEqual(gzip.decompress(compressed.read_bytes()).decode(), self.css)
+        self.assertFalse((self.root / "icon.txt.gz").exists())
+
+    def test_hashed_file_is_served_compressed_and_immutable(self):
+        response = self.get(self.hashed_name, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["Content-Type"].startswith("text/css"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode(), self.css)
+        response.close()
+
+    def test_unhashed_file_is_revalidated(self):
+        response = self.get("css/site.css")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("must-revalidate", response["Cache-Control"])
+        not_modified = self.get("css/site.css", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(not_modified.status_code, 304)
+        response.close()
+
+    def test_compressed_variants_and_missing_files_are_not_served(self):
+        for path in f"{self.hashed_name}.gz", "missing.css", "../secret.txt":
+            with self.subTest(path=path), self.assertRaises(Http404):
+                self.get(path)
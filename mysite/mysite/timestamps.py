@@ -0,0 +1,12 @@
+from django.db import models
+from django.utils import timezone
+
+
+class UpdatedAtQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk `update()` also touches `updated_at`,
+    as `auto_now` only works for `save()`.
+    """
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        return super().update(**kwargs)
@@ -0,0 +1,142 @@
+"""
+Sentry tracing setup.
+
+Traces are sampled per route instead of tracing every request:
+static-like endpoints are almost never traced, checkout and order writes
+are traced often, and routes that were recently slow are always traced.
+"""
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sentry_sdk.envelope import Envelope
+from sentry_sdk.transport import Transport
+
+# (path regex, methods or None for any method, sample rate)
+ROUTE_SAMPLE_RATES = [
+    (r"^/(?:[a-z]{2}/)?(?:static|media|__debug__)/", None, 0.0),
+    (r"^/(?:[a-z]{2}/)?(?:health|ping)/?$", None, 0.0),
+    (r"^/(?:[a-z]{2}/)?sitemap[-\w]*\.xml$", None, 0.01),
+    (r"/feed/?$", None, 0.01),
+    (r"^/(?:[a-z]{2}/)?shop/orders/", ("POST", "PUT", "PATCH", "DELETE"), 1.0),
+    (r"^/(?:[a-z]{2}/)?shop/api/orders/", ("POST", "PUT", "PATCH", "DELETE"), 1.0),
+    (r"^/(?:[a-z]{2}/)?shop/orders/create/$", None, 0.5),
+]
+
+_compiled_rates = [
+    (re.compile(pattern), methods, rate)
+    for pattern, methods, rate in ROUTE_SAMPLE_RATES
+]
+
+
+class SlowRoutes:
+    """
+    Remembers paths whose last request took longer than the threshold,
+    so that the next requests to them are always traced.
+
+    Paths carry ids and slugs, so at most `max_size` of them are kept:
+    expired ones are pruned when it is reached, then the oldest ones.
+    """
+    def __init__(self, threshold_ms: float, ttl: float = 300, max_size: int = 1000):
+        self.threshold_ms = threshold_ms
+        self.ttl = ttl
+        self.max_size = max_size
+        self._seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, path: str, duration_ms: float) -> None:
+        if duration_ms < self.threshold_ms:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # re-inserted at the end: the dict is ordered by expiry
+            self._seen.pop(path, None)
+            if len(self._seen) >= self.max_size:
+                self._seen = {key: expires_at for key, expires_at in self._seen.items() if expires_at >= now}
+            while len(self._seen) >= self.max_size:
+                del self._seen[next(iter(self._seen))]
+            self._seen[path] = now + self.ttl
+
+    def is_slow(self, path: str) -> bool:
+        expires_at = self._seen.get(path)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._seen.pop(path, None)
+            return False
+        return True
+
+
+slow_routes = SlowRoutes(threshold_ms=1000)
+
+
+def route_sample_rate(path: str, method: str, default_rate: float) -> float:
+    for pattern, methods, rate in _compiled_rates:
+        if methods is not None and method not in methods:
+            continue
+        if pattern.search(path):
+            return rate
+    return default_rate
+
+
+def make_traces_sampler(default_rate: float):
+    """
+    Returns a `traces_sampler` for `sentry_sdk.init` that uses
+    `default_rate` for routes without a rule in ROUTE_SAMPLE_RATES.
+    """
+    def traces_sampler(sampling_context: Dict[str, Any]) -> float:
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+
+        environ = sampling_context.get("wsgi_environ") or {}
+        scope = sampling_context.get("asgi_scope") or {}
+        path = environ.get("PATH_INFO") or scope.get("path") or ""
+        method = environ.get("REQUEST_METHOD") or scope.get("method") or "GET"
+
+        if slow_routes.is_slow(path):
+            return 1.0
+        return route_sample_rate(path, method, default_rate)
+
+    return traces_sampler
+
+
+class SlowRequestTracingMiddleware:
+    """
+    Measures request duration and feeds it to `slow_routes`.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        slow_routes.observe(
+            request.path_info,
+            (time.perf_counter() - started) * 1000,
+        )
+        return response
+
+
+class FileTransport(Transport):
+    """
+    Offline transport: appends serialized envelopes to a local file
+    instead of sending them over the network.
+    """
+    def __init__(self, path: Path, options: Optional[Dict[str, Any]] = None):
+        super().__init__(options)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def capture_event(self, event) -> None:
+        envelope = Envelope()
+        envelope.add_event(event)
+        self.capture_envelope(envelope)
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        with self._lock, self.path.open("ab") as f:
+            envelope.serialize_into(f)
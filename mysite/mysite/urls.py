@@ -17,11 +17,12 @@ Including another URLconf
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf.urls.i18n import i18n_patterns
-from django.contrib.sitemaps.views import sitemap
 
-from .sitemaps import sitemaps
+from .media import serve_media
+from .sitemaps import sitemaps, index, sitemap
+from .staticfiles import serve_static
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
@@ -31,6 +32,7 @@ urlpatterns = [
     path('api/schema/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api/', include('myapiapp.urls')),
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
 
 urlpatterns += i18n_patterns(
@@ -42,20 +44,26 @@ urlpatterns += i18n_patterns(
 
     path(
         "sitemap.xml",
+        index,
+        {"sitemaps": sitemaps},
+        name="sitemap-index",
+    ),
+    path(
+        "sitemap-<section>.xml",
         sitemap,
         {"sitemaps": sitemaps},
-        name="from django.contrib.sitemaps.views.sitemaps",
-    )
+        name="django.contrib.sitemaps.views.sitemap",
+    ),
 )
 
 if settings.DEBUG:
-    urlpatterns.extend(
-        static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    )
-
     urlpatterns.extend(
         static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     )
     urlpatterns.append(
         path("__debug__/", include("debug_toolbar.urls")),
     )
+else:
+    urlpatterns.append(
+        re_path(r"^%s(?P<path>.*)$" % settings.STATIC_URL.lstrip("/"), serve_static),
+    )
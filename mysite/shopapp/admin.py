@@ -1,31 +1,31 @@
 from django.urls import path
 
 from django.contrib import admin
-from django.db.models import QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect
 
-from .admin_mixins import ExportAsCSVMixin
+from .admin_mixins import (
+    ExportAsCSVMixin,
+    ChangeListPerformanceMixin,
+    BatchActionsMixin,
+    batch_update_action,
+)
 from .common import save_csv_products, save_csv_orders
 from .models import Product, Order, ProductImage
 from .forms import CSVImportForm
 
 class OrderInline(admin.TabularInline):
     model = Product.order.through
+    raw_id_fields = "order",
 
 class ProductInline(admin.StackedInline):
     model = ProductImage
 
-@admin.action(description="Archive products")
-def mark_archived(modeladmin: admin.ModelAdmin, request: HttpRequest, queryset: QuerySet):
-    queryset.update(archived=True)
-
-@admin.action(description="Unarchive products")
-def mark_unarchived(modeladmin: admin.ModelAdmin, request: HttpRequest, queryset: QuerySet):
-    queryset.update(archived=False)
+mark_archived = batch_update_action("mark_archived", "Archive products", archived=True)
+mark_unarchived = batch_update_action("mark_unarchived", "Unarchive products", archived=False)
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin, ExportAsCSVMixin):
+class ProductAdmin(ChangeListPerformanceMixin, BatchActionsMixin, ExportAsCSVMixin, admin.ModelAdmin):
     change_list_template = "shopapp/products_changelist.html"
     actions = [
         mark_archived,
@@ -101,17 +101,17 @@ class ProductAdmin(admin.ModelAdmin, ExportAsCSVMixin):
 #class ProductInline(admin.TabularInline):
 class ProductInline(admin.StackedInline):
     model = Order.products.through
+    autocomplete_fields = "product",
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ChangeListPerformanceMixin, admin.ModelAdmin):
     change_list_template = "shopapp/orders_changelist.html"
     inlines = [
         ProductInline,
     ]
     list_display = "delivery_address", "promocode", "created_ad", "user_verbose"
-
-    def get_queryset(self, request):
-        return Order.objects.select_related("user").prefetch_related("products")
+    list_select_related = "user",
+    autocomplete_fields = "user", "products"
 
     def user_verbose(self, obj: Order) -> str:
         return obj.user.first_name or obj.user.username
@@ -1,24 +1,251 @@
 import csv
+import logging
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator, List
 
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections, transaction
 from django.db.models import QuerySet
 from django.db.models.options import Options
-from django.http import HttpRequest, HttpResponse
+from django.http import FileResponse, Http404, HttpRequest, JsonResponse, StreamingHttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .paginators import EstimatedCountPaginator
+from .signals import bulk_changed
+
+log = logging.getLogger(__name__)
+
+
+class Echo:
+    """
+    File-like object for csv.writer: returns the written line
+    instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def csv_rows(header: List[str], rows: Iterable) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
 
 class ExportAsCSVMixin:
-    def export_csv(self, request: HttpRequest, queryset: QuerySet):
+    """
+    Admin action "Export as CSV".
+
+    Rows are fetched as tuples in chunks and streamed to the client, foreign
+    keys are exported as ids. Selections larger than
+    `export_csv_background_threshold` are written to a file in a background
+    thread and can be downloaded from the admin later.
+    """
+    export_csv_chunk_size = 2000
+    export_csv_background_threshold = 100_000
+
+    def get_export_fields(self):
         meta: Options = self.model._meta
-        field_names = [field.name for field in meta.fields]
+        return meta.concrete_fields
 
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = f"attachment: filename={meta}-export.csv"
+    def get_export_rows(self, queryset: QuerySet) -> Iterator[tuple]:
+        attnames = [field.attname for field in self.get_export_fields()]
+        return queryset.values_list(*attnames).iterator(chunk_size=self.export_csv_chunk_size)
 
-        csv_writer = csv.writer(response)
+    def get_export_header(self) -> List[str]:
+        return [field.name for field in self.get_export_fields()]
 
-        csv_writer.writerow(field_names)
+    def get_export_dir(self) -> Path:
+        return Path(settings.ADMIN_EXPORTS_DIR)
 
-        for obj in queryset:
-            csv_writer.writerow([getattr(obj, field) for field in field_names])
+    def export_csv(self, request: HttpRequest, queryset: QuerySet):
+        meta: Options = self.model._meta
+        if queryset.count() > self.export_csv_background_threshold:
+            return self.export_csv_in_background(request, queryset)
 
+        response = StreamingHttpResponse(
+            csv_rows(self.get_export_header(), self.get_export_rows(queryset)),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="{meta}-export.csv"'
         return response
 
-    export_csv.short_description = "Export as CSV"
\ No newline at end of file
+    export_csv.short_description = "Export as CSV"
+
+    def export_csv_in_background(self, request: HttpRequest, queryset: QuerySet):
+        meta: Options = self.model._meta
+        name = f"{meta}-export-{uuid.uuid4().hex}.csv"
+        export_dir = self.get_export_dir()
+        export_dir.mkdir(parents=True, exist_ok=True)
+
+        def write_file():
+            try:
+                self.write_export_file(export_dir / name, queryset)
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=write_file, daemon=True).start()
+
+        url = reverse(
+            f"admin:{meta.app_label}_{meta.model_name}_export_csv_download",
+            kwargs={"name": name},
+        )
+        self.message_user(
+            request,
+            format_html(
+                'The export is being prepared in the background. '
+                '<a href="{}">Download it</a> when it is ready.',
+                url,
+            ),
+            messages.INFO,
+        )
+        return None
+
+    def write_export_file(self, file_path: Path, queryset: QuerySet) -> bool:
+        """
+        Writes the export under a temporary name and renames it when complete,
+        so a partial file is never downloaded. Failures are logged, as nobody
+        waits for the background thread; the download link then stays 404.
+        """
+        partial = file_path.with_name(f"{file_path.name}.part")
+        try:
+            with partial.open("w", newline="") as f:
+                f.writelines(csv_rows(self.get_export_header(), self.get_export_rows(queryset)))
+            partial.rename(file_path)
+        except Exception:
+            log.exception("CSV export %s failed", file_path.name)
+            partial.unlink(missing_ok=True)
+            return False
+        return True
+
+    def download_export_csv(self, request: HttpRequest, name: str):
+        meta: Options = self.model._meta
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        file_path = self.get_export_dir() / name
+        if not name.startswith(f"{meta}-export-") or not file_path.is_file():
+            raise Http404("Export is not ready yet")
+        return FileResponse(file_path.open("rb"), as_attachment=True, filename=name)
+
+    def get_urls(self):
+        meta: Options = self.model._meta
+        urls = super().get_urls()
+        new_urls = [
+            path(
+                "export-csv/<str:name>/",
+                self.admin_site.admin_view(self.download_export_csv),
+                name=f"{meta.app_label}_{meta.model_name}_export_csv_download",
+            ),
+        ]
+        return new_urls + urls
+
+
+class ChangeListPerformanceMixin:
+    """
+    Admin changelist settings for large tables: no COUNT(*) over the whole
+    table, neither for pagination nor for the "N total" link.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+def batch_progress_key(task_id: str) -> str:
+    return f"batch-action:{task_id}"
+
+
+def run_batch_update(queryset: QuerySet, values: dict, chunk_size: int = 1000, task_id: str = None) -> int:
+    """
+    Updates the queryset in pk-range chunks, one short transaction per chunk,
+    so that the table is never locked for the whole selection.
+    Sends `bulk_changed` once at the end. Returns the number of updated rows.
+    """
+    queryset = queryset.order_by()
+    total = queryset.count()
+    updated = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        bounds = list(chunk.order_by("pk").values_list("pk", flat=True)[chunk_size - 1:chunk_size])
+        if bounds:
+            chunk = chunk.filter(pk__lte=bounds[0])
+        with transaction.atomic(using=queryset.db):
+            updated += chunk.update(**values)
+        if task_id:
+            cache.set(batch_progress_key(task_id), {"done": updated, "total": total, "finished": False}, 60 * 60)
+        if not bounds:
+            break
+        last_pk = bounds[0]
+
+    if task_id:
+        cache.set(batch_progress_key(task_id), {"done": updated, "total": total, "finished": True}, 60 * 60)
+    bulk_changed.send(sender=queryset.model, fields=sorted(values), count=updated)
+    return updated
+
+
+def batch_update_action(name: str, description: str, chunk_size: int = 1000, background_threshold: int = 10_000, **values):
+    """
+    Builds an admin action that sets `values` on the selected objects with
+    `run_batch_update`. Selections larger than `background_threshold` are
+    updated in a background thread, the progress is reported by
+    `BatchActionsMixin`.
+    """
+    @admin.action(description=description)
+    def action(modeladmin: admin.ModelAdmin, request: HttpRequest, queryset: QuerySet):
+        if queryset.count() <= background_threshold:
+            updated = run_batch_update(queryset, values, chunk_size)
+            modeladmin.message_user(request, f"{updated} objects updated")
+            return
+
+        task_id = uuid.uuid4().hex
+
+        def update():
+            try:
+                run_batch_update(queryset, values, chunk_size, task_id=task_id)
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=update, daemon=True).start()
+        meta: Options = modeladmin.model._meta
+        url = reverse(
+            f"admin:{meta.app_label}_{meta.model_name}_batch_progress",
+            kwargs={"task_id": task_id},
+        )
+        modeladmin.message_user(
+            request,
+            format_html('The update runs in the background, <a href="{}">see the progress</a>.', url),
+            messages.INFO,
+        )
+
+    action.__name__ = name
+    return action
+
+
+class BatchActionsMixin:
+    """
+    Adds the progress view of background batch actions to the admin.
+    """
+    def batch_progress(self, request: HttpRequest, task_id: str) -> JsonResponse:
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        progress = cache.get(batch_progress_key(task_id))
+        if progress is None:
+            raise Http404("Unknown task")
+        return JsonResponse(progress)
+
+    def get_urls(self):
+        meta: Options = self.model._meta
+        urls = super().get_urls()
+        new_urls = [
+            path(
+                "batch-actions/<str:task_id>/",
+                self.admin_site.admin_view(self.batch_progress),
+                name=f"{meta.app_label}_{meta.model_name}_batch_progress",
+            ),
+        ]
+        return new_urls + urls
@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 
 
 class ShopappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shopapp'
+
+    def ready(self):
+        from mysite.media import allow_any, register_media_access
+        from mysite.storage import release_files
+        from mysite.sitemaps import section_invalidator
+        from .media import can_view_receipt
+        from .models import Product, ProductImage, Order
+        from .signals import (
+            record_saved, record_deleted, order_products_changed, product_deleted, product_image_changed, bulk_changed,
+        )
+
+        invalidate_sitemap = section_invalidator("shopapp")
+        post_save.connect(invalidate_sitemap, sender=Product, weak=False)
+        post_delete.connect(invalidate_sitemap, sender=Product, weak=False)
+        bulk_changed.connect(invalidate_sitemap, sender=Product, weak=False)
+
+        for model in Product, ProductImage, Order:
+            post_save.connect(record_saved, sender=model)
+            post_delete.connect(record_deleted, sender=model)
+            post_delete.connect(release_files, sender=model)
+        m2m_changed.connect(order_products_changed, sender=Order.products.through)
+        pre_delete.connect(product_deleted, sender=Product)
+        post_save.connect(product_image_changed, sender=ProductImage)
+        post_delete.connect(product_image_changed, sender=ProductImage)
+
+        register_media_access("products/", allow_any, public=True)
+        register_media_access("orders/receipts/", can_view_receipt)
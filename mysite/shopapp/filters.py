@@ -0,0 +1,33 @@
+from django_filters import rest_framework as filters
+
+from .models import Product, Order
+
+
+class ChangedSinceFilterSet(filters.FilterSet):
+    """
+    `?changed_since=<ISO 8601 datetime>` returns only the rows
+    modified at or after that moment, for incremental sync.
+    """
+    changed_since = filters.IsoDateTimeFilter(field_name="updated_at", lookup_expr="gte")
+
+
+class ProductFilter(ChangedSinceFilterSet):
+    class Meta:
+        model = Product
+        fields = [
+            "name",
+            "description",
+            "price",
+            "discount",
+            "archived",
+        ]
+
+
+class OrderFilter(ChangedSinceFilterSet):
+    class Meta:
+        model = Order
+        fields = [
+            "delivery_address",
+            "promocode",
+            "user",
+        ]
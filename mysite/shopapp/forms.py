@@ -1,4 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django import forms
+from django.core.exceptions import ValidationError
 from .models import Product, Order
 from django.contrib.auth.models import Group
 
@@ -7,14 +10,79 @@ class GroupForm(forms.ModelForm):
         model = Group
         fields = "name",
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+    def __init__(self, attrs=None):
+        super().__init__({"multiple": True, **(attrs or {})})
+
+    def value_from_datadict(self, data, files, name):
+        return files.getlist(name)
+
+
+class MultipleImageField(forms.ImageField):
+    """
+    Several images in one input. The images are decoded and checked
+    in parallel: Pillow releases the GIL while it reads them.
+    """
+    widget = MultipleFileInput
+    default_error_messages = {
+        "too_many": "Upload at most %(max)d images at a time.",
+        "too_large": "%(name)s is %(width)dx%(height)d, images up to %(max_width)dx%(max_height)d are allowed.",
+        "format": "%(name)s is %(format)s, only %(formats)s images are allowed.",
+    }
+
+    def __init__(self, *, max_files=50, max_dimensions=(4096, 4096), formats=("JPEG", "PNG", "WEBP", "GIF"), **kwargs):
+        self.max_files = max_files
+        self.max_dimensions = max_dimensions
+        self.formats = formats
+        kwargs.setdefault("required", False)
+        super().__init__(**kwargs)
+
+    def validate_image(self, data):
+        file = super().clean(data)
+        image = file.image
+        max_width, max_height = self.max_dimensions
+        if image.width > max_width or image.height > max_height:
+            raise ValidationError(self.error_messages["too_large"], code="too_large", params={
+                "name": file.name, "width": image.width, "height": image.height,
+                "max_width": max_width, "max_height": max_height,
+            })
+        if image.format not in self.formats:
+            raise ValidationError(self.error_messages["format"], code="format", params={
+                "name": file.name, "format": image.format, "formats": ", ".join(self.formats),
+            })
+        return file
+
+    def clean(self, data, initial=None):
+        files = [file for file in data if file] if isinstance(data, (list, tuple)) else [data] if data else []
+        if not files:
+            if self.required:
+                raise ValidationError(self.error_messages["required"], code="required")
+            return []
+        if len(files) > self.max_files:
+            raise ValidationError(self.error_messages["too_many"], code="too_many", params={"max": self.max_files})
+
+        def validate(file):
+            try:
+                return self.validate_image(file), None
+            except ValidationError as error:
+                return None, error
+
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            results = list(executor.map(validate, files))
+        errors = [error for _, error in results if error is not None]
+        if errors:
+            raise ValidationError(errors)
+        return [file for file, _ in results]
+
+
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
         fields = "name", "price", "description", "discount", "preview"
 
-    images = forms.ImageField(
-        widget=forms.ClearableFileInput(attrs={"multiple": True}),
-    )
+    images = MultipleImageField()
 
 class OrderForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,65 @@
+from decimal import Decimal
+from timeit import default_timer
+
+from django.core.cache import caches
+from django.core.management import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import translation
+
+from shopapp.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Compares render time of the products list page
+    with and without template fragment caching
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        products = [
+            Product(
+                pk=pk,
+                name=f"Product {pk}",
+                description=f"Description of product {pk}",
+                price=Decimal("9.99") + pk,
+                discount=pk % 20,
+            )
+            for pk in range(1, options["products"] + 1)
+        ]
+        request = RequestFactory().get("/en/shop/products/")
+
+        def render_page():
+            return render_to_string(
+                "shopapp/products-list.html",
+                {"products": products},
+                request=request,
+            )
+
+        def measure() -> float:
+            render_page()
+            started = default_timer()
+            for _ in range(options["repeat"]):
+                render_page()
+            return (default_timer() - started) / options["repeat"] * 1000
+
+        self.stdout.write(
+            f"Render products list with {len(products)} products, "
+            f"{options['repeat']} times"
+        )
+        with translation.override("en"):
+            dummy_cache = {
+                "templates": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            }
+            with override_settings(CACHES={**caches.settings, **dummy_cache}):
+                without_cache = measure()
+            caches["templates"].clear()
+            with_cache = measure()
+
+        self.stdout.write(f"Without fragment cache: {without_cache:.2f} ms per page")
+        self.stdout.write(f"With fragment cache: {with_cache:.2f} ms per page")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: x{without_cache / with_cache:.1f}"))
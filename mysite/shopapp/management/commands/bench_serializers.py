@@ -0,0 +1,76 @@
+from decimal import Decimal
+from timeit import default_timer
+
+from django.contrib.auth.models import User
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from shopapp.models import Order, Product
+from shopapp.serializers import OrderSerializer, ProductSerializer, ValuesRepresentation
+
+
+class Command(BaseCommand):
+    """
+    Compares serialization time of product and order lists:
+    ModelSerializer over instances and ValuesRepresentation over values() rows.
+    The rows are created in a transaction that is rolled back.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        request = RequestFactory().get("/api/", HTTP_HOST="127.0.0.1")
+        context = {"request": request}
+
+        def measure(serialize) -> float:
+            serialize()
+            started = default_timer()
+            for _ in range(options["repeat"]):
+                serialize()
+            return (default_timer() - started) / options["repeat"] / rows * 1000 * 1000
+
+        with transaction.atomic():
+            user = User.objects.create(username="bench_serializers_user")
+            products = Product.objects.bulk_create([
+                Product(
+                    name=f"Product {i}",
+                    description=f"Description of product {i}",
+                    price=Decimal("9.99") + i,
+                    discount=i % 20,
+                    created_by=user,
+                )
+                for i in range(rows)
+            ])
+            orders = Order.objects.bulk_create([
+                Order(delivery_address=f"Street {i}", user=user)
+                for i in range(rows)
+            ])
+            Order.products.through.objects.bulk_create([
+                Order.products.through(order_id=order.pk, product_id=products[(i + j) % rows].pk)
+                for i, order in enumerate(orders)
+                for j in range(3)
+            ])
+
+            for name, serializer_class, queryset in (
+                ("products", ProductSerializer, Product.objects.filter(created_by=user)),
+                ("orders", OrderSerializer, Order.objects.filter(user=user).prefetch_related("products")),
+            ):
+                def with_serializer():
+                    return serializer_class(queryset.all(), many=True, context=context).data
+
+                def with_values():
+                    representation = ValuesRepresentation(serializer_class(context=context))
+                    return representation.to_representation(representation.values(queryset.all()))
+
+                serializer_ms = measure(with_serializer)
+                values_ms = measure(with_values)
+                self.stdout.write(f"{name.capitalize()}, {rows} rows, {options['repeat']} times")
+                self.stdout.write(f"ModelSerializer: {serializer_ms:.1f} ms per 1000 rows")
+                self.stdout.write(f"values() fast path: {values_ms:.1f} ms per 1000 rows")
+                self.stdout.write(self.style.SUCCESS(f"Speedup: x{serializer_ms / values_ms:.1f}"))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+
+from mysite.storage import RELEASE_GRACE_SECONDS, collect_garbage
+
+
+class Command(BaseCommand):
+    """
+    Deletes uploaded files no object references
+    """
+    help = "Deletes content-addressed media files and thumbnails no object references"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace", type=int, default=RELEASE_GRACE_SECONDS,
+            help="Keep files changed in the last GRACE seconds",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only list the files")
+
+    def handle(self, *args, **options):
+        deleted = collect_garbage(grace=options["grace"], dry_run=options["dry_run"])
+        for name in deleted:
+            self.stdout.write(name)
+        action = "would be deleted" if options["dry_run"] else "deleted"
+        self.stdout.write(self.style.SUCCESS(f"Done, {len(deleted)} files {action}"))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management import BaseCommand
+
+from shopapp.outbox import drain, get_sink
+
+
+class Command(BaseCommand):
+    """
+    Delivers shop outbox events to a sink
+    """
+    help = "Delivers shop outbox events to a sink (at-least-once, in order)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sink", default="file", help="file, http or a dotted path to a sink class")
+        parser.add_argument("--path", default="outbox.ndjson", help="output file of the file sink")
+        parser.add_argument("--url", default="http://127.0.0.1:8001/events", help="endpoint of the http sink")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--follow", action="store_true", help="keep polling for new events")
+        parser.add_argument("--interval", type=float, default=1.0, help="polling interval with --follow")
+
+    def handle(self, *args, **options):
+        sink = get_sink(options["sink"], path=options["path"], url=options["url"])
+        self.stdout.write(f"Drain outbox to {options['sink']} sink")
+
+        while True:
+            sent = drain(
+                sink,
+                batch_size=options["batch_size"],
+                on_batch=lambda count: self.stdout.write(f"Sent {count} events"),
+            )
+            if not options["follow"]:
+                break
+            if not sent:
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Done"))
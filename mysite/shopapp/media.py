@@ -0,0 +1,16 @@
+from django.http import HttpRequest
+
+from .models import Order
+
+
+def can_view_receipt(request: HttpRequest, name: str) -> bool:
+    """
+    Receipts are seen by the customer of the order and by the staff
+    allowed to view orders.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    if user.has_perm("shopapp.view_order"):
+        return True
+    return Order.objects.filter(receipt=name, user=user).exists()
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.2 on 2026-10-19 19:16
+
+from django.db import migrations, models
+import mysite.storage
+import shopapp.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopapp', '0013_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='receipt',
+            field=models.FileField(null=True, storage=mysite.storage.get_content_storage, upload_to='orders/receipts'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, storage=mysite.storage.get_content_storage, upload_to=shopapp.models.product_preview_directory_path),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=mysite.storage.get_content_storage, upload_to=shopapp.models.product_images_directory_path),
+        ),
+    ]
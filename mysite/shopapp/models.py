@@ -1,15 +1,111 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
+from mysite.storage import get_content_storage
+from mysite.timestamps import UpdatedAtQuerySet
+
+
+class OutboxEvent(models.Model):
+    """
+    Change of a shop model, written in the same transaction as the change.
+    Delivered to downstream systems by the `drain_outbox` command.
+    """
+    class Meta:
+        ordering = ["pk"]
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTION_CHOICES = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    ]
+
+    model = models.CharField(max_length=100)
+    object_pk = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def for_instance(cls, instance: models.Model, action: str, payload: dict = None) -> "OutboxEvent":
+        if payload is None:
+            fields = [field.name for field in instance._meta.concrete_fields]
+            payload = serializers.serialize("python", [instance], fields=fields)[0]["fields"]
+        return cls(
+            model=instance._meta.label_lower,
+            object_pk=instance.pk,
+            action=action,
+            payload=payload,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.pk,
+            "model": self.model,
+            "object_pk": self.object_pk,
+            "action": self.action,
+            "payload": self.payload,
+            "created_at": self.created_at,
+        }
+
+
+class OutboxQuerySet(models.QuerySet):
+    """
+    QuerySet that writes outbox events for bulk operations,
+    which bypass the model signals.
+    """
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            payload = {"fields": sorted(kwargs)}
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent(
+                    model=self.model._meta.label_lower,
+                    object_pk=pk,
+                    action=OutboxEvent.UPDATED,
+                    payload=payload,
+                )
+                for pk in pks
+            ])
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent.for_instance(obj, OutboxEvent.CREATED)
+                for obj in objs
+                if obj.pk is not None
+            ])
+        return objs
+
+
+class ShopQuerySet(UpdatedAtQuerySet, OutboxQuerySet):
+    pass
+
+
+class OutboxModelMixin:
+    """
+    Saves the object and its outbox event (written by the post_save
+    receiver) in one transaction.
+    """
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
 def product_preview_directory_path(instance: "Product", filename: str) -> str:
-    return "products/product_{pk}/preview/{filename}".format(
-        pk=instance.pk,
-        filename=filename,
-    )
+    # the storage replaces the file name with the hash of the content
+    return "products/previews/{filename}".format(filename=filename)
 
-class Product(models.Model):
+class Product(OutboxModelMixin, models.Model):
     """
     Модель Product представляет товар,
     который можно продавать в интернет-магазине.
@@ -28,9 +124,14 @@ class Product(models.Model):
     price = models.DecimalField(default=0, max_digits=8, decimal_places=2)
     discount = models.SmallIntegerField(default=0)
     created_ad = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="product")
     archived = models.BooleanField(default=False)
-    preview = models.ImageField(null=True, blank=True, upload_to=product_preview_directory_path)
+    preview = models.ImageField(
+        null=True, blank=True, upload_to=product_preview_directory_path, storage=get_content_storage,
+    )
+
+    objects = ShopQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f"Product(pk={self.pk}, name={self.name!r})"
@@ -38,18 +139,25 @@ class Product(models.Model):
     def get_absolute_url(self):
         return reverse("shopapp:product_details", kwargs={"pk": self.pk})
 
+    @property
+    def cache_version(self) -> str:
+        """
+        Changes whenever the product changes.
+        Used in template fragment cache keys.
+        """
+        return self.updated_at.isoformat() if self.updated_at else ""
+
 def product_images_directory_path(instance: "ProductImage", filename: str) -> str:
-    return "products/product_{pk}/images/{filename}".format(
-        pk=instance.product.pk,
-        filename=filename,
-    )
+    return "products/images/{filename}".format(filename=filename)
 
-class ProductImage(models.Model):
+class ProductImage(OutboxModelMixin, models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to=product_images_directory_path)
+    image = models.ImageField(upload_to=product_images_directory_path, storage=get_content_storage)
     description = models.CharField(max_length=200, null=False, blank=True)
 
-class Order(models.Model):
+    objects = OutboxQuerySet.as_manager()
+
+class Order(OutboxModelMixin, models.Model):
     class Meta:
         ordering = ["delivery_address", "promocode"]
         verbose_name = _('Order')
@@ -59,6 +167,9 @@ class Order(models.Model):
     delivery_address = models.TextField(null=True, blank=True)
     promocode = models.CharField(max_length=20, null=False, blank=True)
     created_ad = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     user = models.ForeignKey(User, on_delete=models.PROTECT)
     products = models.ManyToManyField(Product, related_name="order")
-    receipt = models.FileField(null=True, upload_to='orders/receipts')
+    receipt = models.FileField(null=True, upload_to='orders/receipts', storage=get_content_storage)
+
+    objects = ShopQuerySet.as_manager()
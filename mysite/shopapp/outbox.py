@@ -0,0 +1,90 @@
+"""
+Delivery of outbox events to downstream systems.
+
+Events are read in batches in id order, handed to a sink and deleted only
+after the sink accepted them, so every event is delivered at least once.
+Consumers must tolerate duplicates (use the event id to deduplicate).
+"""
+import json
+import os
+from pathlib import Path
+from typing import Callable, List, Optional
+from urllib.request import Request, urlopen
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+
+def to_ndjson(events: List[dict]) -> bytes:
+    return b"".join(
+        json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b"\n"
+        for event in events
+    )
+
+
+class FileSink:
+    """
+    Appends events to a file, one JSON document per line.
+    """
+    def __init__(self, path: str, **options):
+        self.path = Path(path)
+
+    def send(self, events: List[dict]) -> None:
+        with self.path.open("ab") as f:
+            f.write(to_ndjson(events))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class HttpSink:
+    """
+    POSTs each batch as NDJSON to an HTTP endpoint, any non-2xx fails the batch.
+    """
+    def __init__(self, url: str, timeout: float = 10, **options):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events: List[dict]) -> None:
+        request = Request(
+            self.url,
+            data=to_ndjson(events),
+            headers={"Content-Type": "application/x-ndjson"},
+            method="POST",
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise IOError(f"Sink responded with {response.status}")
+
+
+SINKS = {
+    "file": FileSink,
+    "http": HttpSink,
+}
+
+
+def get_sink(name: str, **options):
+    """
+    Builds a sink by its short name or by a dotted path to a class
+    with a `send(events)` method.
+    """
+    sink_class = SINKS[name] if name in SINKS else import_string(name)
+    return sink_class(**options)
+
+
+def drain(sink, batch_size: int = 500, on_batch: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Sends all pending events to the sink, returns the number of events sent.
+    """
+    sent = 0
+    while True:
+        # no transaction around send(): a slow sink must not hold database locks
+        batch = list(OutboxEvent.objects.order_by("pk")[:batch_size])
+        if not batch:
+            return sent
+        sink.send([event.as_dict() for event in batch])
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in batch]).delete()
+        sent += len(batch)
+        if on_batch:
+            on_batch(len(batch))
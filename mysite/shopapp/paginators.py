@@ -0,0 +1,50 @@
+from typing import Optional
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Model
+from django.utils.functional import cached_property
+
+
+def estimate_table_rows(model: type[Model], using: str) -> Optional[int]:
+    """
+    Cheap estimate of the number of rows in the model table,
+    None if the database backend has no cheap way to get it.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == "sqlite":
+            # rowid is the primary key index, so this does not scan the table
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that does not run COUNT(*) over a whole large table:
+    unfiltered querysets use the planner statistics instead.
+    Filtered querysets and small tables are counted exactly.
+    """
+    exact_count_threshold = 10_000
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if getattr(queryset, "query", None) is None or queryset.query.where:
+            return super().count
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
@@ -1,5 +1,12 @@
-from .models import Product, Order
+import decimal
+from typing import Callable, Dict, Iterable, List
+
+from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+from .models import Product, Order
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,6 +18,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "price",
             "discount",
             "created_ad",
+            "updated_at",
             "archived",
             "preview",
         )
@@ -23,7 +31,143 @@ class OrderSerializer(serializers.ModelSerializer):
             "delivery_address",
             "promocode",
             "created_ad",
+            "updated_at",
             "user",
             "products",
             "receipt",
-        )
\ No newline at end of file
+        )
+
+
+def identity(value):
+    return value
+
+
+class ValuesRepresentation:
+    """
+    Read-only fast path of a ModelSerializer for list responses.
+
+    Rows are fetched with `values()` and turned into the same dicts the
+    serializer makes, without model instances and per-field method calls:
+    the converter of every field is picked once per request. Many-to-many
+    fields are filled by one query over all rows of the page.
+    Fields without a fast converter fall back to their `to_representation`.
+    """
+    def __init__(self, serializer: serializers.ModelSerializer):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.fields = [field for field in serializer.fields.values() if not field.write_only]
+        self.many_fields = [field for field in self.fields if isinstance(field, serializers.ManyRelatedField)]
+        self.value_fields = [field for field in self.fields if not isinstance(field, serializers.ManyRelatedField)]
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        sources = [field.source for field in self.value_fields]
+        if self.many_fields and "pk" not in sources:
+            sources.append("pk")
+        # related objects are fetched by related_pks(), not by the queryset
+        return queryset.prefetch_related(None).values(*sources)
+
+    def converter(self, field: serializers.Field) -> Callable:
+        # exact types: subclasses may change the representation
+        if type(field) is serializers.CharField:
+            return identity
+        if type(field) is serializers.IntegerField:
+            return int
+        if type(field) is serializers.BooleanField:
+            return bool
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return identity
+        if isinstance(field, serializers.DecimalField):
+            return self.decimal_converter(field)
+        if isinstance(field, serializers.DateTimeField):
+            return self.datetime_converter(field)
+        if isinstance(field, serializers.FileField):
+            return self.file_converter(field)
+        return field.to_representation
+
+    def decimal_converter(self, field: serializers.DecimalField) -> Callable:
+        coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce_to_string or field.localize or field.decimal_places is None:
+            return field.to_representation
+        exponent = decimal.Decimal(".1") ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+
+        def convert(value):
+            if not isinstance(value, decimal.Decimal):
+                value = decimal.Decimal(str(value).strip())
+            return "{:f}".format(value.quantize(exponent, rounding=field.rounding, context=context))
+
+        return convert
+
+    def datetime_converter(self, field: serializers.DateTimeField) -> Callable:
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return field.to_representation
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+        def convert(value):
+            if not value:
+                return None
+            if field_timezone is not None and timezone.is_aware(value):
+                value = value.astimezone(field_timezone)
+            else:
+                value = field.enforce_timezone(value)
+            value = value.isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return convert
+
+    def file_converter(self, field: serializers.FileField) -> Callable:
+        if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+            return identity
+        storage = self.model._meta.get_field(field.source).storage
+        request = field.context.get("request")
+        # build_absolute_uri() of a path only prepends the scheme and host
+        base = request.build_absolute_uri("/")[:-1] if request is not None else ""
+
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return base + url if url.startswith("/") else url
+
+        return convert
+
+    def related_pks(self, field: serializers.ManyRelatedField, pks: List) -> Dict:
+        """
+        pks of the related objects of every row, in the order of the related
+        manager (the default ordering of the related model).
+        """
+        model_field = self.model._meta.get_field(field.source)
+        query_name = model_field.related_query_name()
+        related = model_field.related_model._default_manager.filter(**{f"{query_name}__in": pks})
+        result = {pk: [] for pk in pks}
+        for pk, related_pk in related.values_list(query_name, "pk"):
+            result[pk].append(related_pk)
+        return result
+
+    def to_representation(self, rows: Iterable[dict]) -> List[dict]:
+        rows = list(rows)
+        # many-to-many fields get a placeholder, so the dicts keep the field order
+        converters = [
+            (field.field_name, None, None) if isinstance(field, serializers.ManyRelatedField)
+            else (field.field_name, field.source, self.converter(field))
+            for field in self.fields
+        ]
+        data = [
+            {
+                name: None if source is None or row[source] is None else convert(row[source])
+                for name, source, convert in converters
+            }
+            for row in rows
+        ]
+        if self.many_fields and rows:
+            pks = [row["pk"] for row in rows]
+            for field in self.many_fields:
+                related = self.related_pks(field, pks)
+                for item, pk in zip(data, pks):
+                    item[field.field_name] = related[pk]
+        return data
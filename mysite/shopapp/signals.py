@@ -0,0 +1,83 @@
+from typing import Dict, List
+
+from django.db.models import QuerySet
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Order, OutboxEvent, Product
+
+# Sent once after a batch update of many objects, instead of per object
+# signals. Arguments: sender (the model), fields, count.
+bulk_changed = Signal()
+
+
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    action = OutboxEvent.CREATED if created else OutboxEvent.UPDATED
+    OutboxEvent.for_instance(instance, action).save()
+
+
+def record_deleted(sender, instance, **kwargs):
+    OutboxEvent.for_instance(instance, OutboxEvent.DELETED, payload={}).save()
+
+
+def order_products_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Changing the products of an order changes the order: its `updated_at`
+    is moved forward and an outbox event with the product ids is written.
+    Runs inside the transaction of the m2m change.
+    """
+    if reverse and action == "pre_clear":
+        # the orders of a product are only known before they are cleared
+        order_pks = Order.objects.filter(products=instance).values_list("pk", flat=True)
+        orders = {pk: [instance.pk] for pk in order_pks}
+    elif action not in ("post_add", "post_remove", "post_clear"):
+        return
+    elif not reverse:
+        orders = {instance.pk: sorted(pk_set or [])}
+    elif pk_set:
+        orders = {pk: [instance.pk] for pk in pk_set}
+    else:
+        return
+    record_orders_changed(orders, action.split("_", 1)[1])
+
+
+def product_deleted(sender, instance, **kwargs):
+    """
+    pre_delete receiver: the rows of a deleted product are removed from its
+    orders by the cascade, which sends no m2m_changed.
+    """
+    order_pks = Order.objects.filter(products=instance).values_list("pk", flat=True)
+    record_orders_changed({pk: [instance.pk] for pk in order_pks}, "remove")
+
+
+def record_orders_changed(orders: Dict[int, List[int]], change: str) -> None:
+    """
+    Moves the `updated_at` of the orders forward and writes an outbox event
+    per order with the added, removed or cleared product ids.
+    """
+    if not orders:
+        return
+    # plain QuerySet.update: the outbox event is written below with the details
+    QuerySet.update(Order.objects.filter(pk__in=orders), updated_at=timezone.now())
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(
+            model=Order._meta.label_lower,
+            object_pk=order_pk,
+            action=OutboxEvent.UPDATED,
+            payload={"products": {"action": change, "pk_set": product_pks}},
+        )
+        for order_pk, product_pks in orders.items()
+    ])
+
+
+def product_image_changed(sender, instance, raw=False, **kwargs):
+    """
+    Images are part of the product page: adding or removing one moves
+    the `updated_at` of the product forward.
+    """
+    if raw:
+        return
+    # plain QuerySet.update: the image change has its own outbox event
+    QuerySet.update(Product.objects.filter(pk=instance.product_id), updated_at=timezone.now())
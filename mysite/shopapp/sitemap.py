@@ -1,4 +1,6 @@
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+from django.urls import reverse
 
 from shopapp.models import Product
 
@@ -6,7 +8,22 @@ from shopapp.models import Product
 class ShopSitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.8
+    limit = 10000
 
     def items(self):
-        return Product.objects.all()
+        return (
+            Product.objects
+            .filter(archived=False)
+            .order_by("pk")
+            .values("pk", "updated_at")
+        )
 
+    def location(self, item: dict) -> str:
+        return reverse("shopapp:product_details", kwargs={"pk": item["pk"]})
+
+    def lastmod(self, item: dict):
+        return item["updated_at"]
+
+    def get_latest_lastmod(self):
+        # archiving a product changes the output too, so no archived filter here
+        return Product.objects.aggregate(latest=Max("updated_at"))["latest"]
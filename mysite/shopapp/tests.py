@@ -1,12 +1,35 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from io import BytesIO, StringIO
+from pathlib import Path
 from string import ascii_letters
 from random import choices
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+from django.contrib import admin
 from django.contrib.auth.models import User, Permission
-from django.test import TestCase
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
+from django.utils import translation
+from PIL import Image
 
 from mysite import settings
-from .models import Product, Order
+from mysite.storage import collect_garbage
+from .models import Product, Order, OutboxEvent, ProductImage
+from .admin import ProductAdmin
+from .admin_mixins import batch_progress_key, run_batch_update
+from .outbox import drain
+from .paginators import EstimatedCountPaginator
+from .serializers import OrderSerializer, ProductSerializer, ValuesRepresentation
+from .signals import bulk_changed
 from shopapp.utils import add_two_numbers
 
 
@@ -210,4 +233,682 @@ class OrdersExportViewTestCase(TestCase):
         self.assertEqual(
             orders_data["orders"],
             expected_data,
-        )
\ No newline at end of file
+        )
+
+class ShopSitemapTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="sitemap_user", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Visible Product", created_by=user)
+        cls.archived = Product.objects.create(name="Archived Product", created_by=user, archived=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_section_skips_archived_products(self):
+        response = self.client.get("/en/sitemap-shopapp.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.product.get_absolute_url())
+        self.assertNotContains(response, self.archived.get_absolute_url())
+        self.assertContains(response, "<lastmod>")
+
+    def test_index_lists_sections(self):
+        response = self.client.get("/en/sitemap.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.2')
+        self.assertContains(response, "sitemap-shopapp.xml")
+        self.assertContains(response, "sitemap-blog.xml")
+
+    def test_not_modified(self):
+        response = self.client.get("/en/sitemap-shopapp.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.3')
+        response = self.client.get(
+            "/en/sitemap-shopapp.xml",
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.4',
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_does_not_add_cache_entries(self):
+        self.client.get("/en/sitemap-shopapp.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.7')
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                "/en/sitemap-shopapp.xml?utm_source=feed&p=1", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.8',
+            )
+        self.assertContains(response, self.product.get_absolute_url())
+
+    def test_section_is_invalidated_on_save(self):
+        self.client.get("/en/sitemap-shopapp.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.5')
+        self.archived.archived = False
+        self.archived.save()
+        response = self.client.get("/en/sitemap-shopapp.xml", HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.0.6')
+        self.assertContains(response, self.archived.get_absolute_url())
+
+
+class LatestProductsFeedTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="feed_user", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Fresh Product", description="Fresh", created_by=user)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_feed(self):
+        response = self.client.get(reverse("shopapp:products-feed"), HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.product.name)
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]{32}"$')
+
+    def test_not_modified_without_rendering(self):
+        response = self.client.get(reverse("shopapp:products-feed"), HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.1.2')
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("shopapp:products-feed"),
+                HTTP_USER_AGENT='Mozilla/5.0',
+                REMOTE_ADDR='10.0.1.3',
+                HTTP_IF_NONE_MATCH=response["ETag"],
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+class ProductFragmentCacheTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="fragment_user", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Cached Product", price="10.00", created_by=user)
+
+    def test_card_is_rerendered_after_change(self):
+        url = reverse("shopapp:product_details", kwargs={"pk": self.product.pk})
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.2.1')
+        self.assertContains(response, "10.00")
+
+        self.product.price = "25.00"
+        self.product.save()
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.2.2')
+        self.assertContains(response, "25.00")
+        self.assertNotContains(response, "10.00")
+
+
+class ChangedSinceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("sync_admin", "sync@example.com", "Pas$w0rd")
+        cls.old = Product.objects.create(name="Old Product", created_by=cls.user)
+        cls.new = Product.objects.create(name="New Product", created_by=cls.user)
+        Product.objects.filter(pk=cls.old.pk).update(updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_bulk_update_touches_updated_at(self):
+        Product.objects.filter(pk=self.old.pk).update(archived=True)
+        self.old.refresh_from_db()
+        self.assertGreater(self.old.updated_at, datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+    def test_api_changed_since(self):
+        response = self.client.get(
+            reverse("shopapp:product-list"),
+            {"changed_since": "2021-01-01T00:00:00Z"},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.3.1',
+        )
+        names = [product["name"] for product in response.json()["results"]]
+        self.assertEqual(names, ["New Product"])
+
+    def test_export_changed_since(self):
+        response = self.client.get(
+            reverse("shopapp:products-export"),
+            {"changed_since": "2021-01-01T00:00:00Z"},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.3.2',
+        )
+        self.assertEqual([p["pk"] for p in response.json()["products"]], [self.new.pk])
+
+    def test_export_invalid_changed_since(self):
+        response = self.client.get(
+            reverse("shopapp:products-export"),
+            {"changed_since": "yesterday"},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.3.3',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_order_products_change_touches_order(self):
+        order = Order.objects.create(user=self.user)
+        Order.objects.filter(pk=order.pk).update(updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        order.products.add(self.new)
+        order.refresh_from_db()
+        self.assertGreater(order.updated_at, datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+
+class OutboxTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="outbox_user", password="Pas$w0rd")
+
+    def test_events_for_save_bulk_update_and_m2m(self):
+        product = Product.objects.create(name="Outbox Product", created_by=self.user)
+        Product.objects.filter(pk=product.pk).update(discount=5)
+        order = Order.objects.create(user=self.user)
+        order.products.add(product)
+
+        events = list(OutboxEvent.objects.values_list("model", "object_pk", "action"))
+        self.assertEqual(events, [
+            ("shopapp.product", product.pk, "created"),
+            ("shopapp.product", product.pk, "updated"),
+            ("shopapp.order", order.pk, "created"),
+            ("shopapp.order", order.pk, "updated"),
+        ])
+        self.assertEqual(
+            OutboxEvent.objects.last().payload,
+            {"products": {"action": "add", "pk_set": [product.pk]}},
+        )
+
+    def test_events_for_reverse_clear(self):
+        product = Product.objects.create(name="Cleared Product", created_by=self.user)
+        orders = [Order.objects.create(user=self.user) for _ in range(2)]
+        product.order.add(*orders)
+        OutboxEvent.objects.all().delete()
+
+        product.order.clear()
+
+        events = OutboxEvent.objects.order_by("object_pk")
+        self.assertEqual([event.object_pk for event in events], [order.pk for order in orders])
+        self.assertEqual(events[0].payload, {"products": {"action": "clear", "pk_set": [product.pk]}})
+
+    def test_events_for_deleted_product(self):
+        product = Product.objects.create(name="Deleted Product", created_by=self.user)
+        order = Order.objects.create(user=self.user)
+        order.products.add(product)
+        OutboxEvent.objects.all().delete()
+
+        product_pk = product.pk
+        product.delete()
+
+        event = OutboxEvent.objects.get(model="shopapp.order")
+        self.assertEqual(event.object_pk, order.pk)
+        self.assertEqual(event.payload, {"products": {"action": "remove", "pk_set": [product_pk]}})
+
+    def test_drain_to_file(self):
+        product = Product.objects.create(name="Drained Product", created_by=self.user)
+        product.delete()
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "events.ndjson"
+            call_command("drain_outbox", sink="file", path=str(path), batch_size=1, stdout=StringIO())
+            events = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([event["action"] for event in events], ["created", "deleted"])
+        self.assertEqual(events[0]["payload"]["name"], "Drained Product")
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_send_keeps_events(self):
+        Product.objects.create(name="Kept Product", created_by=self.user)
+
+        class BrokenSink:
+            def send(self, events):
+                raise IOError("sink is down")
+
+        with self.assertRaises(IOError):
+            drain(BrokenSink())
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+
+class ProductAdminExportCSVTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("export_admin", "export@example.com", "Pas$w0rd")
+        cls.product = Product.objects.create(name="Exported Product", price="12.50", created_by=cls.user)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+        with translation.override("en"):
+            self.changelist_url = reverse("admin:shopapp_product_changelist")
+
+    def test_export_csv_is_streamed(self):
+        response = self.client.post(
+            self.changelist_url,
+            {"action": "export_csv", "_selected_action": [self.product.pk]},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.4.1',
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="shopapp.product-export.csv"',
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "name"])
+        self.assertIn(f"{self.product.pk},Exported Product", lines[1])
+        self.assertIn(f",{self.user.pk},", lines[1])
+
+    def test_large_export_is_written_in_background(self):
+        class InlineThread:
+            def __init__(self, target, **kwargs):
+                self.target = target
+
+            def start(self):
+                self.target()
+
+        with TemporaryDirectory() as tmp, override_settings(ADMIN_EXPORTS_DIR=tmp), \
+                patch.object(ProductAdmin, "export_csv_background_threshold", 0), \
+                patch("shopapp.admin_mixins.threading.Thread", InlineThread), \
+                patch("shopapp.admin_mixins.close_old_connections"):
+            response = self.client.post(
+                self.changelist_url,
+                {"action": "export_csv", "_selected_action": [self.product.pk]},
+                HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.4.2',
+            )
+            self.assertEqual(response.status_code, 302)
+            [message] = get_messages(response.wsgi_request)
+            url = re.search(r'href="([^"]+)"', str(message))[1]
+            self.assertEqual([path.suffix for path in Path(tmp).iterdir()], [".csv"])
+
+            download = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.4.3')
+            self.assertEqual(download.status_code, 200)
+            self.assertIn(b"Exported Product", b"".join(download.streaming_content))
+
+            with translation.override("en"):
+                missing_url = reverse(
+                    "admin:shopapp_product_export_csv_download", kwargs={"name": "shopapp.product-export-missing.csv"},
+                )
+            missing = self.client.get(missing_url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.4.4')
+            self.assertEqual(missing.status_code, 404)
+
+    def test_failed_export_is_logged_and_removed(self):
+        model_admin = ProductAdmin(Product, admin.site)
+        with TemporaryDirectory() as tmp, \
+                patch.object(ProductAdmin, "get_export_rows", side_effect=ValueError("broken")), \
+                self.assertLogs("shopapp.admin_mixins", "ERROR"):
+            self.assertFalse(model_admin.write_export_file(Path(tmp) / "export.csv", Product.objects.all()))
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="paginator_user", password="Pas$w0rd")
+        Product.objects.bulk_create([
+            Product(name=f"Product {i}", created_by=user)
+            for i in range(5)
+        ])
+
+    def test_unfiltered_queryset_is_estimated(self):
+        paginator = EstimatedCountPaginator(Product.objects.all(), 2)
+        paginator.exact_count_threshold = 0
+        with self.assertNumQueries(1):
+            count = paginator.count
+        self.assertGreaterEqual(count, 5)
+
+    def test_filtered_queryset_is_counted(self):
+        paginator = EstimatedCountPaginator(Product.objects.filter(name="Product 1"), 2)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, 1)
+
+    def test_order_changelist(self):
+        admin_user = User.objects.create_superuser("changelist_admin", "admin@example.com", "Pas$w0rd")
+        self.client.force_login(admin_user)
+        response = self.client.get(
+            reverse("admin:shopapp_order_changelist"),
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.5.1',
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class BatchUpdateTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="batch_user", password="Pas$w0rd")
+        Product.objects.bulk_create([
+            Product(name=f"Batch Product {i}", created_by=user)
+            for i in range(7)
+        ])
+
+    def test_updates_in_chunks_and_signals_once(self):
+        calls = []
+
+        def receiver(sender, **kwargs):
+            calls.append(kwargs["count"])
+
+        bulk_changed.connect(receiver, sender=Product)
+        self.addCleanup(bulk_changed.disconnect, receiver, sender=Product)
+
+        updated = run_batch_update(Product.objects.all(), {"archived": True}, chunk_size=3, task_id="test-task")
+
+        self.assertEqual(updated, 7)
+        self.assertFalse(Product.objects.filter(archived=False).exists())
+        self.assertEqual(calls, [7])
+        self.assertEqual(
+            cache.get(batch_progress_key("test-task")),
+            {"done": 7, "total": 7, "finished": True},
+        )
+
+
+class ProductUpdateViewTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username="product_owner", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Owned Product", created_by=cls.owner)
+
+    def test_owner_loads_product_once(self):
+        cache.clear()
+        self.client.force_login(self.owner)
+        url = reverse("shopapp:product_update", kwargs={"pk": self.product.pk})
+        self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.6.1')
+        # user, product; the session comes from the cache
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.6.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_user_is_forbidden(self):
+        other = User.objects.create_user(username="not_owner", password="Pas$w0rd")
+        self.client.force_login(other)
+        response = self.client.get(
+            reverse("shopapp:product_update", kwargs={"pk": self.product.pk}),
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.6.3',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class ProductConditionalGetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="etag_user", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Tagged Product", created_by=user)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.url = reverse("shopapp:product_details", kwargs={"pk": self.product.pk})
+
+    def test_not_modified_before_loading_product(self):
+        response = self.client.get(self.url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.1')
+        self.assertTrue(response.has_header("ETag"))
+
+        # updated_at only, no product, images or rendering
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url,
+                HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.2',
+                HTTP_IF_NONE_MATCH=response["ETag"],
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_image_changes_etag(self):
+        etag = self.client.get(self.url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.3')["ETag"]
+        ProductImage.objects.create(product=self.product, image="products/image.png")
+
+        response = self.client.get(
+            self.url,
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.4',
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_etag_follows_archiving(self):
+        url = reverse("shopapp:products_list")
+        etag = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.5')["ETag"]
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.6', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Product.objects.filter(pk=self.product.pk).update(archived=True)
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.7.7', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ReceiptMediaTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username="receipt_customer", password="Pas$w0rd")
+        cls.other = User.objects.create_user(username="receipt_other", password="Pas$w0rd")
+        cls.order = Order.objects.create(user=cls.customer, receipt="orders/receipts/receipt.pdf")
+
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        receipts = Path(tmp.name) / "orders" / "receipts"
+        receipts.mkdir(parents=True)
+        self.content = bytes(range(256)) * 40
+        (receipts / "receipt.pdf").write_bytes(self.content)
+        settings_override = override_settings(MEDIA_ROOT=tmp.name, MEDIA_OFFLOAD="")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse("media", kwargs={"path": "orders/receipts/receipt.pdf"})
+
+    def get(self, address: str, **headers):
+        return self.client.get(self.url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR=address, **headers)
+
+    def test_receipt_is_served_to_its_customer_only(self):
+        self.assertEqual(self.get('10.0.8.1').status_code, 404)
+        self.client.force_login(self.other)
+        self.assertEqual(self.get('10.0.8.2').status_code, 404)
+
+        self.client.force_login(self.customer)
+        response = self.get('10.0.8.3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        response.close()
+
+    def test_staff_with_permission_sees_receipts(self):
+        self.other.user_permissions.add(Permission.objects.get(codename="view_order"))
+        self.client.force_login(self.other)
+        response = self.get('10.0.8.4')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_range_request(self):
+        self.client.force_login(self.customer)
+        response = self.get('10.0.8.5', HTTP_RANGE="bytes=100-299")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-299/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "200")
+        self.assertEqual(b"".join(response.streaming_content), self.content[100:300])
+        response.close()
+
+        response = self.get('10.0.8.6', HTTP_RANGE="bytes=-10")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-10:])
+        response.close()
+
+        response = self.get('10.0.8.7', HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_not_modified(self):
+        self.client.force_login(self.customer)
+        response = self.get('10.0.8.8')
+        response.close()
+        response = self.get('10.0.8.9', HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_front_server_sends_the_file(self):
+        self.client.force_login(self.customer)
+        with self.settings(MEDIA_OFFLOAD="x-accel-redirect"):
+            response = self.get('10.0.8.10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/orders/receipts/receipt.pdf")
+        self.assertEqual(response.content, b"")
+
+    def test_files_without_access_rule_are_not_served(self):
+        url = reverse("media", kwargs={"path": "orders/other/receipt.pdf"})
+        response = self.client.get(url, HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.8.11')
+        self.assertEqual(response.status_code, 404)
+
+
+class ContentAddressedStorageTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="storage_user", password="Pas$w0rd")
+        cls.products = [
+            Product.objects.create(name=f"Storage Product {i}", created_by=cls.user)
+            for i in range(2)
+        ]
+
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = Path(tmp.name)
+        settings_override = override_settings(MEDIA_ROOT=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def add_image(self, product: Product, content: bytes = b"same image", name: str = "photo.PNG") -> ProductImage:
+        image = ProductImage(product=product)
+        image.image.save(name, ContentFile(content), save=False)
+        image.save()
+        return image
+
+    def age(self, name: str) -> None:
+        path = self.media_root / name
+        os.utime(path, (path.stat().st_atime - 7200, path.stat().st_mtime - 7200))
+
+    def test_identical_uploads_are_stored_once(self):
+        first, second = [self.add_image(product) for product in self.products]
+        other = self.add_image(self.products[0], b"other image")
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(first.image.name, r"^products/images/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.png$")
+        self.assertEqual((self.media_root / first.image.name).read_bytes(), b"same image")
+        self.assertEqual(len(list((self.media_root / "products").rglob("*.png"))), 2)
+
+    def test_unusual_extensions_are_dropped(self):
+        image = self.add_image(self.products[0], name="photo.verylongextension")
+        self.assertRegex(image.image.name, r"/[0-9a-f]{64}$")
+        image = self.add_image(self.products[0], b"other image", name="photo.jépg")
+        self.assertRegex(image.image.name, r"/[0-9a-f]{64}$")
+
+    def test_file_is_deleted_with_its_last_reference(self):
+        first, second = [self.add_image(product) for product in self.products]
+        self.age(first.image.name)
+        path = self.media_root / first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(path.exists())
+
+    def test_unreferenced_files_are_collected(self):
+        image = self.add_image(self.products[0])
+        orphan = self.add_image(self.products[1], b"replaced image")
+        orphan_name = orphan.image.name
+        ProductImage.objects.filter(pk=orphan.pk).update(image=image.image.name)
+
+        self.assertEqual(collect_garbage(), [])
+        self.age(orphan_name)
+        self.assertEqual(collect_garbage(dry_run=True), [orphan_name])
+        self.assertTrue((self.media_root / orphan_name).exists())
+        self.assertEqual(collect_garbage(), [orphan_name])
+        self.assertFalse((self.media_root / orphan_name).exists())
+        self.assertTrue((self.media_root / image.image.name).exists())
+
+
+def image_upload(name: str, size=(20, 10), color="red", image_format="PNG") -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{image_format.lower()}")
+
+
+class ProductImagesUploadTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="gallery_user", password="Pas$w0rd")
+        cls.product = Product.objects.create(name="Gallery Product", created_by=cls.user)
+
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.user)
+        self.url = reverse("shopapp:product_update", kwargs={"pk": self.product.pk})
+
+    def post(self, address: str, images):
+        return self.client.post(
+            self.url,
+            {"name": self.product.name, "price": "10", "description": "", "discount": "0", "images": images},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR=address,
+        )
+
+    def test_images_are_saved_in_bulk(self):
+        images = [image_upload(f"{color}.png", color=color) for color in ("red", "green", "blue")]
+        images.append(image_upload("red-again.png"))
+        response = self.post('10.0.9.1', images)
+
+        self.assertEqual(response.status_code, 302)
+        names = list(self.product.images.values_list("image", flat=True))
+        self.assertEqual(len(names), 4)
+        # the same picture is stored once
+        self.assertEqual(len(set(names)), 3)
+        self.assertEqual(
+            OutboxEvent.objects.filter(model="shopapp.productimage", action=OutboxEvent.CREATED).count(),
+            4,
+        )
+
+    def test_images_are_optional(self):
+        response = self.post('10.0.9.2', [])
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(self.product.images.exists())
+
+    def test_invalid_images_are_rejected(self):
+        not_an_image = SimpleUploadedFile("notes.png", b"not an image", content_type="image/png")
+        too_large = image_upload("huge.png", size=(5000, 10))
+        bmp = image_upload("old.bmp", image_format="BMP")
+        response = self.post('10.0.9.3', [image_upload("fine.png"), not_an_image, too_large, bmp])
+
+        self.assertEqual(response.status_code, 200)
+        errors = response.context["form"].errors["images"]
+        self.assertEqual(len(errors), 3)
+        self.assertIn("huge.png is 5000x10", " ".join(errors))
+        self.assertIn("old.bmp is BMP", " ".join(errors))
+        self.assertFalse(self.product.images.exists())
+
+
+class ValuesRepresentationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("values_admin", "values@example.com", "Pas$w0rd")
+        cls.products = [
+            Product.objects.create(name="Table", price="123.4", discount=5, created_by=cls.user, preview="products/previews/table.png"),
+            Product.objects.create(name="Chair", price="9.99", description="Wooden", created_by=cls.user, archived=True),
+            Product.objects.create(name="Lamp", created_by=cls.user),
+        ]
+        cls.orders = [
+            Order.objects.create(user=cls.user, delivery_address="Street 1", promocode="SALE", receipt="orders/receipts/a.pdf"),
+            Order.objects.create(user=cls.user, delivery_address="Street 2"),
+            Order.objects.create(user=cls.user, delivery_address=None),
+        ]
+        cls.orders[0].products.set(cls.products)
+        cls.orders[1].products.set(cls.products[:1])
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assert_same_as_serializer(self, serializer_class, queryset):
+        context = {"request": RequestFactory().get("/api/", HTTP_HOST="127.0.0.1")}
+        representation = ValuesRepresentation(serializer_class(context=context))
+        with self.assertNumQueries(2 if representation.many_fields else 1):
+            fast = representation.to_representation(representation.values(queryset))
+        expected = serializer_class(queryset, many=True, context=context).data
+        self.assertEqual(json.dumps(fast), json.dumps(expected))
+
+    def test_products_parity(self):
+        self.assert_same_as_serializer(ProductSerializer, Product.objects.all())
+
+    def test_orders_parity(self):
+        self.assert_same_as_serializer(OrderSerializer, Order.objects.order_by("pk"))
+
+    def test_api_list(self):
+        response = self.client.get(
+            reverse("shopapp:order-list"), {"ordering": "created_ad"},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.10.1',
+        )
+        results = response.json()["results"]
+        self.assertEqual([order["pk"] for order in results], [order.pk for order in self.orders])
+        self.assertEqual(results[0]["products"], [product.pk for product in self.orders[0].products.all()])
+        self.assertEqual(results[0]["receipt"], "http://testserver/media/orders/receipts/a.pdf")
+        self.assertEqual(results[2]["products"], [])
+
+        response = self.client.get(
+            reverse("shopapp:product-list"), {"archived": "true"},
+            HTTP_USER_AGENT='Mozilla/5.0', REMOTE_ADDR='10.0.10.2',
+        )
+        self.assertEqual(response.json()["results"], ProductSerializer([self.products[1]], many=True).data)
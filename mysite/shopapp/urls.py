@@ -20,6 +20,7 @@ from .views import (
     OrderViewSet,
     UserOrdersListView,
     export_user_orders,
+    LatestProductsFeed,
 )
 
 
@@ -35,6 +36,7 @@ urlpatterns = [
     path("groups/", GroupListView.as_view(), name="groups_list"),
     path("products/", ProductsListView.as_view(), name="products_list"),
     path("products/export", ProductsDataExportView.as_view(), name="products-export"),
+    path("products/latest/feed/", LatestProductsFeed(), name="products-feed"),
     path("products/create/", ProductCreateView.as_view(), name="product_create"),
     path("products/<int:pk>", ProductDetailsView.as_view(), name="product_details"),
     path("products/<int:pk>/update/", ProductUpdateView.as_view(), name="product_update"),
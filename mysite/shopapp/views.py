@@ -7,7 +7,6 @@ import logging
 from csv import DictWriter
 from timeit import default_timer
 
-from django.contrib.syndication.views import Feed
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import Group, User
 from django.http import HttpResponse, HttpRequest, HttpResponseRedirect, JsonResponse
@@ -18,6 +17,7 @@ from django.views import View
 from django.views.decorators.cache import cache_page
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.core.cache import cache
+from django.db.models.functions import Substr
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
@@ -27,31 +27,64 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from drf_spectacular.utils import extend_schema
 
+from mysite.conditional import ConditionalGetMixin, queryset_version
+from mysite.feeds import CachedFeed
+from myauth.mixins import ObjectPermissionMixin
+
 from .common import save_csv_products
+from .filters import ProductFilter, OrderFilter
 from .forms import ProductForm, OrderForm, GroupForm
-from .models import Product, Order, ProductImage
-from .serializers import ProductSerializer, OrderSerializer
+from .models import Product, Order
+from .serializers import ProductSerializer, OrderSerializer, ValuesRepresentation
+from .uploads import save_product_images
 
 
 log = logging.getLogger(__name__)
 
 
-class LatestProductsFeed(Feed):
+class LatestProductsFeed(CachedFeed):
     title = "Latest Products"
-    llink = reverse_lazy("shopapp:product_details")
+    link = reverse_lazy("shopapp:products_list")
     description = "Updates on the latest products"
+    # all products: archiving one changes the output too
+    modified_model = Product
 
     def items(self):
-        return Product.objects.order_by('-created_ad')[:10]
+        return (
+            Product.objects
+            .filter(archived=False)
+            .order_by('-created_ad')
+            .annotate(summary=Substr("description", 1, 200))
+            .only("pk", "name", "created_ad")[:10]
+        )
 
     def item_title(self, item: Product):
         return item.name
 
     def item_description(self, item: Product):
-        return item.description[:200]
+        return item.summary
+
+    def item_pubdate(self, item: Product):
+        return item.created_ad
+
+class ValuesListMixin:
+    """
+    `list` of a ModelViewSet serialized from `values()` rows by
+    ValuesRepresentation: the same JSON as the serializer, without
+    model instances.
+    """
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        representation = ValuesRepresentation(self.get_serializer())
+        queryset = representation.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        data = representation.to_representation(queryset if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
 
 @extend_schema(description="Product views CRUD")
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(ValuesListMixin, ModelViewSet):
     """
     Набор представлений для действий над Product
     Полный CRUD для сущностей товара
@@ -64,17 +97,12 @@ class ProductViewSet(ModelViewSet):
         OrderingFilter,
     ]
     search_fields = ["name", "description"]
-    filterset_fields = [
-        "name",
-        "description",
-        "price",
-        "discount",
-        "archived",
-    ]
+    filterset_class = ProductFilter
     ordering_fields = [
         "name",
         "price",
         "discount",
+        "updated_at",
     ]
     @method_decorator(cache_page(60 * 2))
     def list(self, *args, **kwargs):
@@ -115,20 +143,17 @@ class ProductViewSet(ModelViewSet):
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
 
-class OrderViewSet(ModelViewSet):
-    queryset = Order.objects.all()
+class OrderViewSet(ValuesListMixin, ModelViewSet):
+    queryset = Order.objects.prefetch_related("products")
     serializer_class = OrderSerializer
     filter_backends = [
         DjangoFilterBackend,
         OrderingFilter,
     ]
-    filterset_fields = [
-        "delivery_address",
-        "promocode",
-        "user",
-    ]
+    filterset_class = OrderFilter
     ordering_fields = [
         "created_ad",
+        "updated_at",
     ]
 
 class ShopIndexView(View):
@@ -163,18 +188,25 @@ class GroupListView(View):
             form.save()
         return redirect(request.path)
 
-class ProductDetailsView(DetailView):
+class ProductDetailsView(ConditionalGetMixin, DetailView):
     template_name = 'shopapp/products-details.html'
     # model = Product
     queryset = Product.objects.prefetch_related("images")
     context_object_name = "product"
 
-class ProductsListView(ListView):
+    def get_version_token(self):
+        updated_at = Product.objects.filter(pk=self.kwargs["pk"]).values_list("updated_at", flat=True).first()
+        return updated_at and f"{self.kwargs['pk']}:{updated_at.isoformat()}"
+
+class ProductsListView(ConditionalGetMixin, ListView):
     template_name = 'shopapp/products-list.html'
     # model = Product
     context_object_name = "products"
     queryset = Product.objects.filter(archived=False)
 
+    def get_version_token(self):
+        return str(queryset_version(self.get_queryset()))
+
 class ProductCreateView(UserPassesTestMixin, CreateView):
     def test_func(self):
         return self.request.user.is_superuser or self.request.user.has_perm("shopapp.add_product")
@@ -185,22 +217,20 @@ class ProductCreateView(UserPassesTestMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.created_by = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        save_product_images(self.object, form.cleaned_data["images"])
+        return response
 
-class ProductUpdateView(UserPassesTestMixin, UpdateView):
+class ProductUpdateView(ObjectPermissionMixin, UpdateView):
 
     model = Product
     # fields = "name", "price", "description", "discount", "preview"
     form_class = ProductForm
     template_name_suffix = "_update_form"
+    permission_required = "shopapp.change_product"
 
-    def test_func(self):
-        product = self.get_object()
-        user = self.request.user
-        return (
-                user.is_superuser or
-                (product.created_by == user or user.has_perm("shopapp.change_product"))
-        )
+    def has_object_permission(self, product: Product) -> bool:
+        return product.created_by_id == self.request.user.pk
 
     def get_success_url(self):
         return reverse(
@@ -210,11 +240,7 @@ class ProductUpdateView(UserPassesTestMixin, UpdateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        for image in form.files.getlist("images"):
-            ProductImage.objects.create(
-                product=self.object,
-                image=image,
-            )
+        save_product_images(self.object, form.cleaned_data["images"])
         return response
 
 class ProductDeleteView(DeleteView):
@@ -274,7 +300,10 @@ class OrderDeleteView(DeleteView):
 
 class ProductsDataExportView(View):
     def get(self, request: HttpRequest) -> JsonResponse:
-        products = Product.objects.order_by("pk").all()
+        filterset = ProductFilter(request.GET, queryset=Product.objects.order_by("pk"))
+        if not filterset.is_valid():
+            return JsonResponse({"errors": filterset.errors}, status=400)
+        products = filterset.qs
         products_data = [
             {
                 "pk": product.pk,
@@ -284,14 +313,14 @@ class ProductsDataExportView(View):
             }
             for product in products
         ]
-        elem = products_data[0]
-        name = elem["name"]
-        print("name:", name)
         return JsonResponse({"products": products_data})
 
 class OrdersDataExportView(View):
     def get(self, request: HttpRequest) -> JsonResponse:
-        orders = Order.objects.all()
+        filterset = OrderFilter(request.GET, queryset=Order.objects.all())
+        if not filterset.is_valid():
+            return JsonResponse({"errors": filterset.errors}, status=400)
+        orders = filterset.qs
         orders_data = [
             {
                 "id": order.id,